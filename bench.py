@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarking the Simulations
+
+Times the hot paths of dice.py and games.py with fixed seeds at several
+problem sizes, and keeps a JSON history of the runs:
+
+    python bench.py run                 # benchmark and add the run to the history
+    python bench.py compare             # compare the last two runs in the history
+
+@author: Nick
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import numpy as np
+import dice
+import games
+from streams import Stream
+
+def _strategies():
+    """
+    The 3,125 stand strategies of the blackjack study, dealer last
+    """
+    stands = range(12, 17)
+    return np.array([list(s) + [17] for s in itertools.product(stands, repeat=5)])
+
+# each case sets up the work for a problem size and seed, and returns the function to time
+def _roll(n, seed):
+    rng = Stream(seed)
+    return lambda: [dice.roll(6, rng) for i in range(n // 6)]
+
+def _sublist(n, seed):
+    return lambda: [dice.sublist([1, 1, 1], [1, 5, 1, 2, 1, 6]) for i in range(n)]
+
+def _value(n, seed):
+    rolls = Stream(seed).dice((n, 6)).tolist()
+    return lambda: [dice.value(r) for r in rolls]
+
+def _value_batch(n, seed):
+    rolls = Stream(seed).dice((n, 6))
+    return lambda: dice.value_batch(rolls)
+
+def _play(n, seed):
+    return lambda: dice.play(rounds=n, rng=seed)
+
+def _play_batch(n, seed):
+    return lambda: dice.play_batch(rounds=n, rng=seed)
+
+def _roll_dice(n, seed):
+    return lambda: games.roll_dice(rolls=n, dice=2, sides=6, rng=seed)
+
+def _draw_cards(n, seed):
+    rng = Stream(seed)
+    return lambda: [games.draw_cards(decks=7, draws=36, rng=rng) for i in range(n)]
+
+def _deal_cards(n, seed):
+    return lambda: games.deal_cards(hands=n, decks=7, draws=36, rng=seed)
+
+def _spin_roulette(n, seed):
+    return lambda: games.spin_roulette(spins=n, rng=seed)
+
+def _roulette_payouts(n, seed):
+    pockets = games.spin_pockets(n, rng=seed)
+    return lambda: games.roulette_payouts(pockets, {"Red": 1})
+
+def _blackjack(n, seed):
+    shoes = games.CARD_VALUES[games.deal_cards(hands=n, decks=7, draws=36, rng=seed)]
+    strategies = _strategies()
+    return lambda: [games.play_strategy_tree(shoe, strategies) for shoe in shoes]
+
+# the unit of work, problem sizes and setup of each case
+CASES = {
+    "dice.roll": ("rolls", [1200, 12000], _roll),
+    "dice.sublist": ("calls", [1000, 10000], _sublist),
+    "dice.value": ("rolls", [1000, 10000], _value),
+    "dice.value_batch": ("rolls", [10**4, 10**6], _value_batch),
+    "dice.play": ("rounds", [100, 1000], _play),
+    "dice.play_batch": ("rounds", [10**4, 10**6], _play_batch),
+    "games.roll_dice": ("rolls", [10**4, 10**6], _roll_dice),
+    "games.draw_cards": ("hands", [100, 1000], _draw_cards),
+    "games.deal_cards": ("hands", [10**4, 10**5], _deal_cards),
+    "games.spin_roulette": ("spins", [10**4, 10**6], _spin_roulette),
+    "games.roulette_payouts": ("spins", [10**6, 10**7], _roulette_payouts),
+    "games.play_strategy_tree": ("hands", [10, 100], _blackjack),
+}
+
+def measure(f, units, repeat=3):
+    """
+    Times a function and measures its peak memory
+
+    Parameters
+    ----------
+    f : function
+        The function to time.
+
+    units : int
+        The units of work (rolls, hands, spins, ...) one call does.
+
+    repeat : int
+        The number of timed calls, the fastest is kept.
+
+    Returns
+    -------
+    result : dictionary
+        The seconds of the fastest call, its throughput and the peak memory in MB
+    """
+    seconds = []
+    for r in range(repeat):
+        start = time.perf_counter()
+        f()
+        seconds.append(time.perf_counter() - start)
+
+    # trace memory on a separate call, tracing slows the call down
+    tracemalloc.start()
+    f()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {"seconds": min(seconds), "throughput": units / min(seconds), "peak_mb": peak / 2**20}
+
+def run(cases=None, quick=False, repeat=3, seed=2024):
+    """
+    Benchmarks the cases at each of their sizes
+
+    Parameters
+    ----------
+    cases : list, optional
+        The names of the cases to run, defaults to every case.
+
+    quick : bool
+        Should only the smallest size of each case be run?
+
+    repeat : int
+        The number of timed calls of each case.
+
+    seed : int
+        The seed of every case.
+
+    Returns
+    -------
+    record : dictionary
+        The run, with one result per case and size
+    """
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ""
+    record = {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "commit": commit,
+              "python": platform.python_version(), "numpy": np.__version__, "results": []}
+
+    for name in cases or CASES:
+        unit, sizes, setup = CASES[name]
+        for size in sizes[:1] if quick else sizes:
+            result = measure(setup(size, seed), size, repeat=repeat)
+            result.update({"name": name, "size": size, "unit": unit})
+            record["results"].append(result)
+            print("{:<28}{:>10,} {:<7}{:>14,.0f} {}/s{:>10.1f} MB".format(
+                name, size, unit, result["throughput"], unit, result["peak_mb"]))
+    return record
+
+def load_history(path):
+    """
+    Loads the runs in a history file, oldest first
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+def compare(old, new, threshold=0.1):
+    """
+    Compares the throughput of two runs
+
+    Parameters
+    ----------
+    old : dictionary
+        The run to compare against.
+
+    new : dictionary
+        The run to compare.
+
+    threshold : float
+        The fraction of throughput a case can lose before it's a regression.
+
+    Returns
+    -------
+    regressions : list
+        The (name, size, ratio) of each case that got slower by more than threshold
+    """
+    before = {(r["name"], r["size"]): r for r in old["results"]}
+    regressions = []
+    for r in new["results"]:
+        if (r["name"], r["size"]) not in before:
+            continue
+        ratio = r["throughput"] / before[(r["name"], r["size"])]["throughput"]
+        flag = "REGRESSION" if ratio < 1 - threshold else ""
+        if flag:
+            regressions.append((r["name"], r["size"], ratio))
+        print("{:<28}{:>10,}{:>10.2f}x {}".format(r["name"], r["size"], ratio, flag))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the dice and games simulations.")
+    parser.add_argument("--history", default="bench_history.json", help="the JSON file of past runs")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="benchmark and add the run to the history")
+    run_parser.add_argument("--cases", nargs="+", choices=list(CASES), help="the cases to run")
+    run_parser.add_argument("--quick", action="store_true", help="only run the smallest size of each case")
+    run_parser.add_argument("--repeat", type=int, default=3, help="the timed calls of each case")
+    run_parser.add_argument("--seed", type=int, default=2024, help="the seed of every case")
+
+    compare_parser = commands.add_parser("compare", help="compare the last run with an earlier one")
+    compare_parser.add_argument("--baseline", type=int, default=-2, help="the index of the run to compare against")
+    compare_parser.add_argument("--threshold", type=float, default=0.1, help="the throughput lost before it's a regression")
+
+    args = parser.parse_args(argv)
+    history = load_history(args.history)
+
+    if args.command == "run":
+        history.append(run(cases=args.cases, quick=args.quick, repeat=args.repeat, seed=args.seed))
+        games.write_atomic(args.history, lambda f: f.write(json.dumps(history, indent=1).encode()))
+        return 0
+
+    if len(history) < 2:
+        print("the history needs at least two runs to compare")
+        return 1
+    regressions = compare(history[args.baseline], history[-1], threshold=args.threshold)
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
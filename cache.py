@@ -0,0 +1,308 @@
+# -*- coding: utf-8 -*-
+"""
+Caching the Results of the Simulations
+
+Results are stored under a key hashed from the function, its arguments and
+the source of the modules it runs, so editing the code never serves a stale
+result:
+
+    python cache.py list                     # list the cached results
+    python cache.py invalidate --function f  # drop the results of a function
+    python cache.py clear                    # drop every result
+
+Only seeded calls are cached: a call whose seed is None, a Generator or a
+Stream draws different numbers every time, so it always runs.
+
+@author: Nick
+"""
+
+import argparse
+import functools
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import sys
+import time
+import types
+import numpy as np
+import pandas as pd
+
+class Cache:
+    """
+    A directory of pickled results, evicting the least recently used past a size limit
+
+    Parameters
+    ----------
+    path : str
+        The directory the results are kept in, created on the first store.
+
+    max_bytes : int
+        The most bytes of results to keep.
+    """
+
+    def __init__(self, path=".simcache", max_bytes=2**30):
+        self.path = path
+        self.max_bytes = max_bytes
+
+    def _file(self, key, ext):
+        return os.path.join(self.path, key + ext)
+
+    def get(self, key):
+        """
+        Loads a result, marking it as just used
+
+        Returns
+        -------
+        hit : tuple
+            Whether the key was found, and its result
+        """
+        try:
+            with open(self._file(key, ".pkl"), "rb") as f:
+                value = pickle.load(f)
+        except Exception:
+            # a missing, truncated or unloadable result (e.g. of a renamed class) is a miss
+            return False, None
+        os.utime(self._file(key, ".pkl"))
+        return True, value
+
+    def put(self, key, value, meta=None):
+        """
+        Stores a result and what it was computed from, then evicts down to max_bytes
+        """
+        os.makedirs(self.path, exist_ok=True)
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        meta = dict(meta or {}, bytes=len(data), created=time.strftime("%Y-%m-%dT%H:%M:%S"))
+        for ext, content in [(".json", json.dumps(meta, indent=1).encode()), (".pkl", data)]:
+            temp = self._file(key, ext + ".tmp")
+            with open(temp, "wb") as f:
+                f.write(content)
+            os.replace(temp, self._file(key, ext))
+        self.evict(keep=key)
+
+    def entries(self):
+        """
+        Lists the cached results
+
+        Returns
+        -------
+        entries : pandas DataFrame
+            The Key, Function, Params, Bytes, Created and Last_used of each
+            result, most recently used first
+        """
+        rows = []
+        if os.path.isdir(self.path):
+            for name in os.listdir(self.path):
+                if not name.endswith(".pkl"):
+                    continue
+                key = name[:-4]
+                try:
+                    with open(self._file(key, ".json")) as f:
+                        meta = json.load(f)
+                    used = os.path.getmtime(self._file(key, ".pkl"))
+                except (OSError, ValueError):
+                    continue
+                rows.append([key, meta.get("function"), json.dumps(meta.get("params")), meta.get("bytes"),
+                             meta.get("created"), time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(used)), used])
+        entries = pd.DataFrame(rows, columns=["Key", "Function", "Params", "Bytes", "Created", "Last_used", "used"])
+        return entries.sort_values(by="used", ascending=False).drop(columns="used").reset_index(drop=True)
+
+    def invalidate(self, function=None, key=None):
+        """
+        Drops the results of a function, or the one with key, or every result when neither is given
+
+        Returns
+        -------
+        dropped : int
+            The number of results dropped
+        """
+        entries = self.entries()
+        if function is not None:
+            entries = entries.loc[entries["Function"] == function]
+        if key is not None:
+            entries = entries.loc[entries["Key"] == key]
+        for k in entries["Key"]:
+            self._remove(k)
+        return len(entries)
+
+    def evict(self, keep=None):
+        """
+        Drops the least recently used results until the rest fit in max_bytes
+        """
+        entries = self.entries()
+        total = entries["Bytes"].sum()
+        for k, size in zip(entries["Key"][::-1], entries["Bytes"][::-1]):
+            if total <= self.max_bytes:
+                break
+            if k != keep:
+                self._remove(k)
+                total -= size
+
+    def _remove(self, key):
+        for ext in [".pkl", ".json"]:
+            try:
+                os.remove(self._file(key, ext))
+            except FileNotFoundError:
+                pass
+
+_default = None
+
+def default_cache():
+    """
+    Gets the shared cache, kept in the GAMES_CACHE directory (default .simcache)
+    with at most GAMES_CACHE_BYTES bytes (default 1 GB)
+    """
+    global _default
+    if _default is None:
+        _default = Cache(os.environ.get("GAMES_CACHE", ".simcache"), int(os.environ.get("GAMES_CACHE_BYTES", 2**30)))
+    return _default
+
+def _canonical(value):
+    """
+    Turns an argument into plain JSON values, arrays become a hash of their contents
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (list, tuple, range)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): _canonical(value[k]) for k in sorted(value, key=str)}
+    if isinstance(value, np.ndarray):
+        return {"dtype": value.dtype.str, "shape": list(value.shape),
+                "sha256": hashlib.sha256(np.ascontiguousarray(value).tobytes()).hexdigest()}
+    raise TypeError("can't cache an argument of type " + type(value).__name__)
+
+@functools.lru_cache(maxsize=None)
+def _file_hash(file, mtime, size):
+    """
+    Hashes a source file, cached by its modification time and size so an edit is read again
+    """
+    with open(file, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def _source_hash(f):
+    """
+    Hashes the source of the modules next to a function that it runs: its own
+    and every one it imports, directly or through another of them
+
+    Recomputed on every call, so editing a module (and reloading it in a
+    notebook) never serves a stale result.
+    """
+    module = sys.modules.get(f.__module__)
+    root = os.path.dirname(os.path.abspath(inspect.getsourcefile(f)))
+    files = {}
+    todo = [module]
+    while todo:
+        module = todo.pop()
+        file = getattr(module, "__file__", None)
+        if file is None or os.path.dirname(os.path.abspath(file)) != root or os.path.abspath(file) in files:
+            continue
+        file = os.path.abspath(file)
+        stat = os.stat(file)
+        files[file] = _file_hash(file, stat.st_mtime_ns, stat.st_size)
+
+        # follow the modules it imports, and the modules of the functions and classes it imports from them
+        for v in list(vars(module).values()):
+            if isinstance(v, types.ModuleType):
+                todo.append(v)
+            elif isinstance(v, (types.FunctionType, type)):
+                todo.append(sys.modules.get(v.__module__))
+    return hashlib.sha256(json.dumps({os.path.basename(k): v for k, v in files.items()}, sort_keys=True).encode()).hexdigest()
+
+def cached(seed="rng", ignore=(), keys=None, version="1", cache=None):
+    """
+    Caches the results of a simulator's seeded calls
+
+    Parameters
+    ----------
+    seed : str
+        The argument holding the seed, only calls with an integer seed are cached.
+
+    ignore : tuple
+        The arguments that don't change the result, e.g. the number of workers.
+
+    keys : dict, optional
+        Functions turning an argument into what it's keyed by, e.g. a file
+        into a summary of what's in it. They are called again after a run,
+        so a result is stored under the file the run wrote.
+
+    version : str
+        Bumped to drop the cached results of the function by hand.
+
+    cache : Cache, optional
+        Where the results are kept, defaults to default_cache().
+
+    Returns
+    -------
+    decorator : function
+        Wraps the simulator, the wrapped function keeps the original as .uncached
+    """
+    keys = keys or {}
+
+    def decorator(f):
+        signature = inspect.signature(f)
+        module = f.__module__
+        if module == "__main__":
+            module = os.path.splitext(os.path.basename(sys.modules[module].__file__))[0]
+        name = module + "." + f.__qualname__
+
+        # look a call up by its function, arguments and code version
+        def key(arguments):
+            params = _canonical({k: keys[k](v) if k in keys else v for k, v in arguments.items() if k not in ignore})
+            meta = {"function": name, "params": params, "version": version, "source": _source_hash(f)}
+            return hashlib.sha256(json.dumps(meta, sort_keys=True).encode()).hexdigest(), meta
+
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            if not isinstance(bound.arguments[seed], (int, np.integer)) or isinstance(bound.arguments[seed], bool):
+                return f(*args, **kwargs)
+            try:
+                k, meta = key(bound.arguments)
+            except (TypeError, ValueError, OSError):
+                return f(*args, **kwargs)
+
+            store = cache or default_cache()
+            hit, value = store.get(k)
+            if not hit:
+                value = f(*args, **kwargs)
+
+                # key the result by the arguments as the run left them, e.g. a file it wrote
+                if keys:
+                    k, meta = key(bound.arguments)
+                store.put(k, value, meta)
+            return value
+
+        wrapper.uncached = f
+        return wrapper
+    return decorator
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="List or drop cached simulation results.")
+    parser.add_argument("--path", default=None, help="the cache directory, defaults to GAMES_CACHE or .simcache")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="list the cached results")
+    invalidate_parser = commands.add_parser("invalidate", help="drop the results of a function or key")
+    invalidate_parser.add_argument("--function", default=None, help="the function, e.g. games.tally_dice")
+    invalidate_parser.add_argument("--key", default=None, help="the key of one result")
+    commands.add_parser("clear", help="drop every result")
+    args = parser.parse_args(argv)
+
+    store = Cache(args.path) if args.path else default_cache()
+    if args.command == "list":
+        with pd.option_context("display.max_colwidth", 60, "display.width", 200):
+            print(store.entries())
+    elif args.command == "invalidate":
+        if args.function is None and args.key is None:
+            parser.error("invalidate needs --function or --key, use clear to drop everything")
+        print("dropped", store.invalidate(function=args.function, key=args.key))
+    else:
+        print("dropped", store.invalidate())
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
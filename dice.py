@@ -5,11 +5,20 @@ Simulating with Dice
 @author: Nick
 """
 
+from concurrent.futures import ProcessPoolExecutor
 from copy import deepcopy
+from functools import lru_cache
+from itertools import combinations_with_replacement
+import argparse
+import math
+import os
+import sys
 import numpy as np
 import pandas as pd
+from streams import as_stream
+from cache import cached
 
-def roll(n):
+def roll(n, rng=None):
     """
     Represents rolling dice
 
@@ -18,15 +27,15 @@ def roll(n):
     n : int
         The number of dice to roll.
 
+    rng : int, numpy Generator, Stream, optional
+        The random stream (or its seed) for rolling the dice.
+
     Returns
     -------
     roll_ : list
         The number rolled for each die.
     """
-    roll_ = []
-    for i in range(n):
-        roll_.append(np.random.choice(np.arange(6) + 1, size=1)[0])
-    return roll_
+    return as_stream(rng).dice(n).tolist()
 
 def sublist(list_one, list_two, diff=False):
     """
@@ -65,6 +74,62 @@ def sublist(list_one, list_two, diff=False):
     return False
 
 
+# the scoring patterns of a roll and the points each is worth
+PATTERNS = [[5], [1], [1, 1, 1], [2, 2, 2], [3, 3, 3],
+            [4, 4, 4], [5, 5, 5], [6, 6, 6], [1, 1, 1, 1], [2, 2, 2, 2],
+            [3, 3, 3, 3], [4, 4, 4, 4], [5, 5, 5, 5], [6, 6, 6, 6], [1, 1, 1, 1, 1],
+            [2, 2, 2, 2, 2], [3, 3, 3, 3, 3], [4, 4, 4, 4, 4], [5, 5, 5, 5, 5], [6, 6, 6, 6, 6],
+            [1, 1, 1, 1, 1, 1], [2, 2, 2, 2, 2, 2], [3, 3, 3, 3, 3, 3], [4, 4, 4, 4, 4, 4], [5, 5, 5, 5, 5, 5],
+            [6, 6, 6, 6, 6, 6], [1, 2, 3, 4, 5, 6]]
+PATTERN_VALUES = [50, 100, 1000, 200, 300,
+                  400, 500, 600, 2000, 400,
+                  600, 800, 1000, 1200, 3000,
+                  600, 900, 1200, 1500, 1800,
+                  4000, 800, 1200, 1600, 2000,
+                  2400, 1000]
+
+# a roll is encoded as a base-7 integer of its face counts: sum(7 ** (face - 1))
+# index 0 is an empty slot so padded rolls can be encoded too
+FACE_CODES = np.array([0] + [7 ** f for f in range(6)], dtype=np.int64)
+
+def score_table():
+    """
+    Builds the scoring index for every roll of at most 6 dice
+
+    Returns
+    -------
+    points : numpy array
+        The points of a roll, indexed by its base-7 face count code.
+
+    used : numpy array
+        The number of dice the scoring pattern uses, indexed the same way.
+    """
+    # the face counts of every roll, adding one face at a time while at most 6 dice are used
+    counts = np.zeros((1, 0), dtype=np.int64)
+    for face in range(6):
+        counts = np.concatenate([np.column_stack([counts, np.full(len(counts), c)]) for c in range(7)])
+        counts = counts[counts.sum(axis=1) <= 6]
+    rolls = counts @ FACE_CODES[1:]
+
+    # the face counts, points and dice of each pattern
+    patterns = np.array([np.bincount(p, minlength=7)[1:] for p in PATTERNS])
+    values = np.array(PATTERN_VALUES)
+    sizes = patterns.sum(axis=1)
+
+    # keep the most valuable pattern each roll holds, using the fewest dice on a tie
+    holds = (patterns[None, :, :] <= counts[:, None, :]).all(axis=2)
+    rank = np.where(holds, values * 8 + 7 - sizes, -1)
+    best = rank.argmax(axis=1)
+    found = holds[np.arange(rolls.size), best]
+
+    points = np.zeros(7 ** 6, dtype=np.int32)
+    used = np.zeros(7 ** 6, dtype=np.int8)
+    points[rolls] = np.where(found, values[best], 0)
+    used[rolls] = np.where(found, sizes[best], 0)
+    return points, used
+
+POINTS, USED = score_table()
+
 def value(a):
     """
     Determines the value(s) of a roll of the dice
@@ -79,44 +144,30 @@ def value(a):
     values_ : dictionary
         Indicating the value of a roll and the number of dice left
     """
-    # build a table of all values
-    roll_ = [[5], [1], [1, 1, 1], [2, 2, 2], [3, 3, 3],
-             [4, 4, 4], [5, 5, 5], [6, 6, 6], [1, 1, 1, 1], [2, 2, 2, 2],
-             [3, 3, 3, 3], [4, 4, 4, 4], [5, 5, 5, 5], [6, 6, 6, 6], [1, 1, 1, 1, 1],
-             [2, 2, 2, 2, 2], [3, 3, 3, 3, 3], [4, 4, 4, 4, 4], [5, 5, 5, 5, 5], [6, 6, 6, 6, 6],
-             [1, 1, 1, 1, 1, 1], [2, 2, 2, 2, 2, 2], [3, 3, 3, 3, 3, 3], [4, 4, 4, 4, 4, 4], [5, 5, 5, 5, 5, 5],
-             [6, 6, 6, 6, 6, 6], [1, 2, 3, 4, 5, 6]]
-    value_ = [50, 100, 1000, 200, 300,
-              400, 500, 600, 2000, 400,
-              600, 800, 1000, 1200, 3000,
-              600, 900, 1200, 1500, 1800,
-              4000, 800, 1200, 1600, 2000,
-              2400, 1000]
-
-    match_ = []
-    for r in roll_:
-        match_.append(sublist(r, a))
-
-    values_ = pd.DataFrame({"roll": roll_,
-                            "value": value_,
-                            "match": match_})
-
-    # sort the table and only keep the matches
-    values_ = values_.sort_values(by="value")
-    values_ = values_.loc[values_["match"] == True].reset_index(drop=True)
-
-    # find how many points the roll is worth
-    # find how many dice are left
-    if values_.shape[0] == 0:
-        points = 0
-        left = len(a)
-    else:
-        points = values_["value"].tolist()[-1]
-        left = len(a) - len(values_["roll"].tolist()[-1])
+    code = 0
+    for i in a:
+        code += FACE_CODES[i]
+    return {"points": int(POINTS[code]), "dice": len(a) - int(USED[code])}
 
-    return {"points": points, "dice": left}
+def value_batch(a):
+    """
+    Determines the value(s) of many rolls of the dice at once
+
+    Parameters
+    ----------
+    a : numpy array
+        Rolls of the dice, one per row. A 0 marks a slot with no die in it.
+
+    Returns
+    -------
+    values_ : dictionary
+        Indicating the value of each roll and the number of dice left
+    """
+    a = np.asarray(a)
+    code = FACE_CODES[a].sum(axis=-1)
+    return {"points": POINTS[code], "dice": (a > 0).sum(axis=-1) - USED[code]}
 
-def play(rounds=10, min_pts=300, min_dice=3):
+def play(rounds=10, min_pts=300, min_dice=3, rng=None):
     """
     Play a game of dice
 
@@ -131,12 +182,16 @@ def play(rounds=10, min_pts=300, min_dice=3):
     min_dice : int
         The minimum number of dice to keep rolling in a round
 
+    rng : int, numpy Generator, Stream, optional
+        The random stream (or its seed) for rolling the dice
+
     Returns
     -------
     score : pandas DataFrame
         The score after each round
 
     """
+    rng = as_stream(rng)
     score = pd.DataFrame()
     r=1
     while r <= rounds:
@@ -144,7 +199,7 @@ def play(rounds=10, min_pts=300, min_dice=3):
         dice=6
         rolling=True
         while rolling:
-            roll_ = roll(dice)
+            roll_ = roll(dice, rng)
             value_ = value(roll_)
             pts = pts + value_["points"]
             dice = value_["dice"]
@@ -165,21 +220,507 @@ def play(rounds=10, min_pts=300, min_dice=3):
             # no longer have enough dice to roll
             if dice < min_dice:
                 rolling = False
-        score = pd.concat([score, pd.DataFrame({"Round": [r], "Points": [pts]})], axis=0)
+        score = pd.concat([score, pd.DataFrame({"Round": [r], "Points": [pts]})], axis=0, ignore_index=True)
         r += 1
-    score["Total"] = score["Points"].cumsum().reset_index(drop=True)
+    score["Total"] = score["Points"].cumsum()
+    return score
+
+def play_rounds(rounds, min_pts, min_dice, roll_):
+    """
+    Scores every round of a game of dice at once with the given dice rolls
+
+    Parameters
+    ----------
+    rounds : int
+        The number of rounds in the game
+
+    min_pts : int
+        The minium number of points to stop rolling in a round
+
+    min_dice : int
+        The minimum number of dice to keep rolling in a round
+
+    roll_ : function
+        Takes the rounds still rolling and the number of rolls so far, and
+        returns 6 dice for each of those rounds
+
+    Returns
+    -------
+    pts : numpy array
+        The points of each round
+
+    """
+    pts = np.zeros(rounds, dtype=np.int64)
+    dice = np.full(rounds, 6, dtype=np.int8)
+    rolling = np.arange(rounds)
+    step = 0
+    while rolling.size > 0:
+        # roll the dice of every round still rolling, 0 marks an unused die
+        faces = roll_(rolling, step)
+        faces[np.arange(6) >= dice[rolling][:, None]] = 0
+        value_ = value_batch(faces)
+        pts[rolling] += value_["points"]
+        left = value_["dice"]
+
+        # reset the dice
+        left[left == 0] = 6
+        dice[rolling] = left
+
+        # got nothing on the roll
+        nothing = value_["points"] == 0
+        pts[rolling[nothing]] = 0
+
+        # stop on nothing, on meeting min points or on too few dice
+        done = nothing | (pts[rolling] >= min_pts) | (left < min_dice)
+        rolling = rolling[~done]
+        step += 1
+    return pts
+
+def play_points(rounds=10, min_pts=300, min_dice=3, rng=None):
+    """
+    Scores every round of a game of dice at once
+
+    Parameters
+    ----------
+    rounds : int
+        The number of rounds in the game
+
+    min_pts : int
+        The minium number of points to stop rolling in a round
+
+    min_dice : int
+        The minimum number of dice to keep rolling in a round
+
+    rng : int, numpy Generator, Stream, optional
+        The random stream (or its seed) for rolling the dice
+
+    Returns
+    -------
+    pts : numpy array
+        The points of each round
+
+    """
+    rng = as_stream(rng)
+    return play_rounds(rounds, min_pts, min_dice, lambda rolling, step: rng.dice((rolling.size, 6)))
+
+def play_batch(rounds=10, min_pts=300, min_dice=3, rng=None):
+    """
+    Play a game of dice with every round simulated at once
+
+    Parameters
+    ----------
+    rounds : int
+        The number of rounds in the game
+
+    min_pts : int
+        The minium number of points to stop rolling in a round
+
+    min_dice : int
+        The minimum number of dice to keep rolling in a round
+
+    rng : int, numpy Generator, Stream, optional
+        The random stream (or its seed) for rolling the dice
+
+    Returns
+    -------
+    score : pandas DataFrame
+        The score after each round
+
+    """
+    pts = play_points(rounds=rounds, min_pts=min_pts, min_dice=min_dice, rng=rng)
+    score = pd.DataFrame({"Round": np.arange(1, rounds + 1), "Points": pts})
+    score["Total"] = score["Points"].cumsum()
     return score
 
-# set up grid for rolling dice
-min_pts = [100, 200, 300, 400, 500, 600]
-min_dice = [1, 2, 3]
-grid = pd.DataFrame(np.array(np.meshgrid(min_pts, min_dice)).reshape(2, int(len(min_pts) * len(min_dice))).T,
-                    columns = ["min_pts", "min_dice"])
-
-# score each strategy in the grid with a game of dice
-score = []
-for i in range(grid.shape[0]):
-    play_i = play(rounds=500, min_pts=grid["min_pts"].tolist()[i], min_dice=grid["min_dice"].tolist()[i])
-    score.append(play_i["Total"].tolist()[-1])
-grid["score"] = score
-grid.sort_values(by="score", ascending=False)
+@lru_cache(maxsize=None)
+def roll_outcomes(n):
+    """
+    Enumerates what a roll of n dice can do, and the probability of each
+
+    Parameters
+    ----------
+    n : int
+        The number of dice rolled
+
+    Returns
+    -------
+    outcomes : tuple of numpy arrays
+        The points, the dice left to roll (6 after using them all, 0 when
+        the roll is worth nothing) and the probability of each distinct
+        outcome of the roll
+    """
+    outcomes = {}
+    for a in combinations_with_replacement(range(1, 7), n):
+        # the number of orders the dice can come up in
+        counts = np.bincount(a, minlength=7)[1:]
+        ways = math.factorial(n) // math.prod(math.factorial(int(c)) for c in counts)
+
+        # score the roll, using all the dice resets them
+        code = int(FACE_CODES[list(a)].sum())
+        points = int(POINTS[code])
+        left = (n - int(USED[code]) or 6) if points else 0
+        outcomes[(points, left)] = outcomes.get((points, left), 0) + ways
+
+    keys = sorted(outcomes)
+    points = np.array([k[0] for k in keys], dtype=np.int64)
+    left = np.array([k[1] for k in keys], dtype=np.int64)
+    prob = np.array([outcomes[k] for k in keys], dtype=np.float64) / 6 ** n
+    for x in (points, left, prob):
+        x.flags.writeable = False
+    return points, left, prob
+
+def _round_values(min_pts=None, min_dice=None, cap=20000):
+    """
+    Values every (points, dice) state of a round by backward induction
+
+    A state is the points banked so far in the round and the dice left to
+    roll, after a scoring roll. Every roll adds at least 50 points, so the
+    states form a chain that only moves up in points, and are valued from
+    cap down. At cap the round always stops.
+
+    Parameters
+    ----------
+    min_pts : int, optional
+        The minium number of points to stop rolling in a round, None plays
+        the best choice in each state
+
+    min_dice : int, optional
+        The minimum number of dice to keep rolling in a round
+
+    cap : int
+        The points at which every round stops
+
+    Returns
+    -------
+    values_ : tuple of numpy arrays
+        The value of each state with the choice of the policy, and the
+        expected points of rolling from it, indexed by [points // 50, dice]
+    """
+    # a threshold policy stops at min_pts, so the states past it needn't be valued
+    top = cap // 50 if min_pts is None else min(cap // 50, -(-min_pts // 50))
+    outcomes = [None] + [roll_outcomes(d) for d in range(1, 7)]
+    stop = np.zeros((top + 1, 7), dtype=np.float64)
+    roll_ = np.zeros((top + 1, 7), dtype=np.float64)
+    for k in range(top, -1, -1):
+        for d in range(1, 7):
+            points, left, prob = outcomes[d]
+
+            # past the cap the round stops with what it has, nothing loses it all
+            nxt = k + points // 50
+            won = np.where(nxt <= top, stop[np.minimum(nxt, top), left], 50 * nxt)
+            roll_[k, d] = np.sum(prob * np.where(points > 0, won, 0))
+
+            # keep rolling or bank the points
+            if k == top:
+                stop[k, d] = 50 * k
+            elif min_pts is None:
+                stop[k, d] = max(50 * k, roll_[k, d])
+            elif 50 * k >= min_pts or d < min_dice:
+                stop[k, d] = 50 * k
+            else:
+                stop[k, d] = roll_[k, d]
+    return stop, roll_
+
+def expected_points(min_pts=300, min_dice=3, cap=20000):
+    """
+    Computes the exact expected points of a round of dice
+
+    Parameters
+    ----------
+    min_pts : int
+        The minium number of points to stop rolling in a round
+
+    min_dice : int
+        The minimum number of dice to keep rolling in a round
+
+    cap : int
+        The points at which every round stops, only matters when min_pts
+        is beyond it
+
+    Returns
+    -------
+    points : float
+        The expected points of a round, which always starts by rolling 6 dice
+    """
+    return float(_round_values(min_pts, min_dice, cap)[1][0, 6])
+
+def expected_grid(min_pts, min_dice, cap=20000):
+    """
+    Computes the exact expected points of a round for every (min_pts, min_dice) strategy
+
+    Parameters
+    ----------
+    min_pts : list
+        The minium numbers of points to stop rolling in a round
+
+    min_dice : list
+        The minimum numbers of dice to keep rolling in a round
+
+    cap : int
+        The points at which every round stops
+
+    Returns
+    -------
+    grid : pandas DataFrame
+        The strategies and the expected points of a round of each
+    """
+    grid = strategy_grid(min_pts, min_dice)
+    grid["expected"] = [expected_points(p, d, cap) for p, d in zip(grid["min_pts"], grid["min_dice"])]
+    return grid
+
+def optimal_policy(cap=20000):
+    """
+    Finds the roll or stop choice that maximizes the expected points of a round
+
+    Parameters
+    ----------
+    cap : int
+        The points at which every round stops
+
+    Returns
+    -------
+    policy : dictionary
+        The "policy" table, with one row per (Points, Dice) state, the
+        expected points of rolling from it and whether to Roll, and the
+        "expected" points of a round played with it
+    """
+    stop, roll_ = _round_values(cap=cap)
+    points, dice = np.meshgrid(np.arange(0, 50 * (cap // 50) + 1, 50), np.arange(1, 7), indexing="ij")
+    policy = pd.DataFrame({"Points": points.ravel(), "Dice": dice.ravel(),
+                           "Roll_value": roll_[:, 1:].ravel()})
+    policy["Roll"] = (policy["Roll_value"] > policy["Points"]) & (policy["Points"] < 50 * (cap // 50))
+    return {"policy": policy, "expected": float(roll_[0, 6])}
+
+def strategy_grid(min_pts, min_dice):
+    """
+    Sets up a grid of (min_pts, min_dice) strategies
+
+    Parameters
+    ----------
+    min_pts : list
+        The minium numbers of points to stop rolling in a round
+
+    min_dice : list
+        The minimum numbers of dice to keep rolling in a round
+
+    Returns
+    -------
+    grid : pandas DataFrame
+        One row per strategy
+    """
+    return pd.DataFrame(np.array(np.meshgrid(min_pts, min_dice)).reshape(2, int(len(min_pts) * len(min_dice))).T,
+                        columns = ["min_pts", "min_dice"])
+
+def _grid_task(task):
+    """
+    Scores one chunk of rounds for one strategy of a grid search
+    """
+    min_pts, min_dice, rounds, seed = task
+    return int(play_points(rounds=rounds, min_pts=min_pts, min_dice=min_dice, rng=seed).sum())
+
+@cached(seed="seed", ignore=("workers",))
+def grid_search(min_pts, min_dice, rounds=500, workers=None, seed=None, chunk=100000):
+    """
+    Scores every (min_pts, min_dice) strategy with a game of dice
+
+    The rounds of each strategy are split into chunks of at most `chunk`
+    rounds, and every chunk rolls on its own stream spawned from `seed`,
+    so the scores only depend on the seed and not on the number of workers.
+    Searches with an integer seed are cached, see cache.cached.
+
+    Parameters
+    ----------
+    min_pts : list
+        The minium numbers of points to stop rolling in a round
+
+    min_dice : list
+        The minimum numbers of dice to keep rolling in a round
+
+    rounds : int
+        The number of rounds in the game of each strategy
+
+    workers : int, optional
+        The number of processes to play with, defaults to every core.
+        1 plays in this process.
+
+    seed : int, numpy SeedSequence, optional
+        The root seed of the random streams
+
+    chunk : int
+        The largest number of rounds played by one task
+
+    Returns
+    -------
+    grid : pandas DataFrame
+        The strategies and the total score of each
+    """
+    grid = strategy_grid(min_pts, min_dice)
+
+    # split the rounds of each strategy into chunks with their own seed
+    sizes = [chunk] * (rounds // chunk) + ([rounds % chunk] if rounds % chunk else [])
+    seed = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    tasks = []
+    for i, s in enumerate(seed.spawn(grid.shape[0])):
+        for n, c in zip(sizes, s.spawn(len(sizes))):
+            tasks.append((int(grid["min_pts"][i]), int(grid["min_dice"][i]), n, c))
+
+    # score the chunks and add them up for each strategy
+    if workers == 1:
+        totals = list(map(_grid_task, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            totals = list(pool.map(_grid_task, tasks, chunksize=max(1, len(tasks) // (4 * (workers or os.cpu_count() or 1)))))
+    grid["score"] = np.array(totals, dtype=np.int64).reshape(grid.shape[0], len(sizes)).sum(axis=1)
+    return grid
+
+class CommonDice:
+    """
+    Pre-drawn dice shared by every strategy of a comparison
+
+    Roll k of round r always shows the same 6 dice, whichever strategy is
+    playing, so differences between strategies aren't drowned in the noise
+    of different rolls. More rolls are drawn as the longest rounds need them,
+    so compare_strategies keeps one CommonDice per chunk of rounds.
+
+    Parameters
+    ----------
+    rounds : int
+        The number of rounds in the game
+
+    rng : int, numpy Generator, Stream, optional
+        The random stream (or its seed) for rolling the dice
+    """
+
+    def __init__(self, rounds, rng=None):
+        self.rounds = rounds
+        self.stream = as_stream(rng)
+        self.rolls = []
+
+    def roll(self, rolling, step, antithetic=False):
+        """
+        Gets roll number step of the rounds still rolling, or its antithetic roll (7 - face)
+        """
+        while step >= len(self.rolls):
+            self.rolls.append(self.stream.dice((self.rounds, 6)))
+        faces = self.rolls[step][rolling]
+        return 7 - faces if antithetic else faces
+
+def compare_strategies(min_pts, min_dice, rounds=500, baseline=None, antithetic=False, rng=None, chunk=100000):
+    """
+    Scores every (min_pts, min_dice) strategy on the same dice rolls
+
+    The rounds are played a chunk at a time on their own CommonDice, so only
+    the rolls of one chunk are kept, however many rounds there are.
+
+    Parameters
+    ----------
+    min_pts : list
+        The minium numbers of points to stop rolling in a round
+
+    min_dice : list
+        The minimum numbers of dice to keep rolling in a round
+
+    rounds : int
+        The number of rounds in the game of each strategy
+
+    baseline : tuple, optional
+        The (min_pts, min_dice) strategy to compare against, defaults to the first in the grid
+
+    antithetic : bool
+        Should each round also be played with every die flipped (7 - face), averaging the pair?
+
+    rng : int, numpy Generator, Stream, optional
+        The random stream (or its seed) for rolling the dice
+
+    chunk : int
+        The largest number of rounds played on one set of rolls
+
+    Returns
+    -------
+    grid : pandas DataFrame
+        The strategies with their total score, the mean difference in points
+        per round from the baseline (diff) and its standard error (se)
+    """
+    grid = strategy_grid(min_pts, min_dice)
+    baseline = (int(grid["min_pts"][0]), int(grid["min_dice"][0])) if baseline is None else baseline
+    strategies = [(int(grid["min_pts"][i]), int(grid["min_dice"][i])) for i in range(grid.shape[0])] + [baseline]
+    stream = as_stream(rng)
+
+    def points(common, min_pts, min_dice):
+        pts = play_rounds(common.rounds, min_pts, min_dice, common.roll)
+        if antithetic:
+            flipped = play_rounds(common.rounds, min_pts, min_dice, lambda rolling, step: common.roll(rolling, step, antithetic=True))
+            return (pts + flipped) / 2
+        return pts
+
+    # play every strategy and the baseline on the same rolls a chunk at a time,
+    # adding up the scores and the differences from the baseline round by round
+    score, diff, diff_sq = 0, 0, 0
+    for start in range(0, rounds, chunk):
+        common = CommonDice(min(chunk, rounds - start), stream)
+        pts = np.array([points(common, *s) for s in strategies])
+        score = score + pts[:-1].sum(axis=1)
+        diff = diff + (pts[:-1] - pts[-1]).sum(axis=1)
+        diff_sq = diff_sq + ((pts[:-1] - pts[-1]) ** 2.0).sum(axis=1)
+
+    grid["score"] = score
+    grid["diff"] = diff / rounds
+    grid["se"] = np.sqrt(np.maximum(diff_sq - diff ** 2.0 / rounds, 0) / (rounds - 1) / rounds) if rounds > 1 else np.nan
+    return grid
+
+def grid_study(min_pts=(100, 200, 300, 400, 500, 600), min_dice=(1, 2, 3), rounds=500, workers=None, seed=None, output="."):
+    """
+    Runs the dice study: scores a grid of strategies and writes it out best first
+
+    Each simulated score sits next to its exact expectation to check it against.
+
+    Parameters
+    ----------
+    min_pts : list
+        The minium numbers of points to stop rolling in a round
+
+    min_dice : list
+        The minimum numbers of dice to keep rolling in a round
+
+    rounds : int
+        The number of rounds in the game of each strategy
+
+    workers : int, optional
+        The number of processes to play with, defaults to every core
+
+    seed : int, optional
+        The root seed of the random streams
+
+    output : str
+        The directory "Dice Strategy.csv" is written to
+
+    Returns
+    -------
+    grid : pandas DataFrame
+        The strategies, the total score of each and its expected score, best first
+    """
+    grid = grid_search(list(min_pts), list(min_dice), rounds=rounds, workers=workers, seed=seed)
+    grid["expected"] = expected_grid(list(min_pts), list(min_dice))["expected"] * rounds
+    grid = grid.sort_values(by="score", ascending=False).reset_index(drop=True)
+    os.makedirs(output, exist_ok=True)
+    grid.to_csv(os.path.join(output, "Dice Strategy.csv"), index=False)
+    return grid
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a grid of dice strategies.")
+    parser.add_argument("--min-pts", type=int, nargs="+", default=[100, 200, 300, 400, 500, 600],
+                        help="the minimum points to stop rolling in a round")
+    parser.add_argument("--min-dice", type=int, nargs="+", default=[1, 2, 3],
+                        help="the minimum dice to keep rolling in a round")
+    parser.add_argument("--rounds", type=int, default=500, help="the rounds in the game of each strategy")
+    parser.add_argument("--workers", type=int, default=None, help="the processes to play with, defaults to every core")
+    parser.add_argument("--seed", type=int, default=None, help="the root seed of the random streams")
+    parser.add_argument("--output", default=".", help="the directory the results are written to")
+    args = parser.parse_args(argv)
+
+    print(grid_study(args.min_pts, args.min_dice, rounds=args.rounds, workers=args.workers,
+                     seed=args.seed, output=args.output))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,490 +1,1221 @@
-# set the path of where the input files are
-mywd = "C:\\Users\\Nick Morris\\Desktop"
-
 # -----------------------------------------------------------------------------------
 # ---- Packages ---------------------------------------------------------------------
 # -----------------------------------------------------------------------------------
 
 # data handling
+import argparse
 import os
+import sys
 import pandas as pd
 import numpy as np
-import gc
-import time
-
-# graphics
-from plotnine import *
+import json
+import hashlib
+import math
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from itertools import combinations_with_replacement
+from functools import lru_cache
+from statistics import NormalDist
+from streams import as_stream
+from progress import Progress, Timers, NO_TIMERS
+from cache import cached
+import odds
 
 # ----------------------------------------------------------------------------------
 # ---- Functions -------------------------------------------------------------------
 # ----------------------------------------------------------------------------------
 
 # build a function for rolling dice
-def roll_dice(rolls = 100, dice = 2, sides = 6, seed = None):
-    
-    # set the seed
-    np.random.seed(seed)
+def roll_dice(rolls = 100, dice = 2, sides = 6, rng = None):
     
     # roll the dice
-    dice_rolls = pd.DataFrame(np.random.choice(a = [i + 1 for i in range(sides)],
-                                               size = (rolls, dice),
-                                               replace = True),
+    dice_rolls = pd.DataFrame(as_stream(rng).dice(size = (rolls, dice), sides = sides),
                               columns = ["Dice_" + str(i + 1) for i in range(dice)])
     return dice_rolls
 
-# build a function for drawing cards
-def draw_cards(decks = 1, draws = 18, seed = None):
+# build a function for coding sorted dice combinations as 0 up to the number of combinations
+def combo_codes(rolls, sides = 6):
     
-    # set up all the suites
-    suites = ["Hearts", "Diamonds", "Spades", "Clubs"]
+    # sort each roll and count its faces from 0
+    rolls = np.sort(np.asarray(rolls, dtype = "int64"), axis = 1) - 1
+    dice = rolls.shape[1]
     
-    # set up all the face values
-    faces = [i + 2 for i in range(9)]
-    faces.extend(["Jack", "King", "Queen", "Ace"])
+    # rank the combinations with the combinatorial number system: the i-th smallest die adds C(die + i, i + 1)
+    binom = np.array([[math.comb(n, k) for k in range(dice + 1)] for n in range(sides + dice)], dtype = "int64")
+    return binom[rolls + np.arange(dice), np.arange(dice) + 1].sum(axis = 1)
+
+# build a function for rolling dice in chunks, keeping only the counts of each total and sorted combination
+@cached(seed = "rng")
+def tally_dice(rolls = 100, dice = 2, sides = 6, chunk = 2**20, combos = True, rng = None):
     
-    # assign each face value to each suite
-    cards = [str(j) + "_" + i for j in faces for i in suites]
+    # set up the counts, combinations are only counted when there aren't too many of them
+    stream = as_stream(rng)
+    totals = np.zeros(dice * sides + 1, dtype = "int64")
+    combos = combos and math.comb(sides + dice - 1, dice) <= 10**6
+    if combos:
+        combo_counts = np.zeros(math.comb(sides + dice - 1, dice), dtype = "int64")
     
-    # set the seed
-    np.random.seed(seed)
+    # roll the dice a chunk at a time and add up the counts
+    for start in range(0, int(rolls), chunk):
+        dice_rolls = stream.dice(size = (min(chunk, int(rolls) - start), dice), sides = sides)
+        totals += np.bincount(dice_rolls.sum(axis = 1, dtype = "int64"), minlength = totals.size)
+        if combos:
+            combo_counts += np.bincount(combo_codes(dice_rolls, sides), minlength = combo_counts.size)
     
-    # create decks of cards and shuffle them
-    cards = np.random.permutation(np.repeat(cards, decks))
+    # create the tables of counts
+    tally = {"totals": pd.DataFrame({"Total": np.arange(dice, dice * sides + 1), "Count": totals[dice:]}), "combos": None}
+    if combos:
+        every_combo = np.array(list(combinations_with_replacement(range(1, sides + 1), dice)))
+        labels = [str(c) for c in every_combo.tolist()]
+        tally["combos"] = pd.DataFrame({"Combo": pd.Categorical(labels, categories = labels),
+                                        "Count": combo_counts[combo_codes(every_combo, sides)]})
     
-    # draw the cards
-    drawing = pd.Series([cards[i] for i in np.random.choice(a = range(len(cards)),
-                                                            size = (min(draws, len(cards))),
-                                                            replace = False)])
+    return tally
+
+# build a function for the exact probability of each dice total, cached by (dice, sides)
+@lru_cache(maxsize = None)
+def total_pmf(dice = 2, sides = 6, method = "auto"):
     
-    # split up the cards by their face value and suite
-    drawing = drawing.str.split("_", expand = True)
+    # the total of one die is uniform over its sides, index i holds the probability of a total of i
+    die = np.append([0.0], np.repeat(1 / sides, sides))
     
-    # update the column names in drawing
-    drawing.columns = ["Face", "Suite"]
+    # convolve the dice directly while it's cheap, otherwise raise the die's Fourier transform to the power of dice
+    if method == "direct" or (method == "auto" and dice * sides <= 2000):
+        pmf = np.array([1.0])
+        for d in range(dice):
+            pmf = np.convolve(pmf, die)
+    elif method in ("fft", "auto"):
+        pmf = np.fft.irfft(np.fft.rfft(die, dice * sides + 1) ** dice, dice * sides + 1)
+        pmf = np.clip(pmf, 0, None)
+        pmf[:dice] = 0
+        pmf = pmf / pmf.sum()
+    else:
+        raise ValueError("method must be 'auto', 'direct' or 'fft'")
     
-    return drawing
+    pmf = pmf[dice:]
+    pmf.flags.writeable = False
+    return pmf
 
-# build a function for spinning roulette
-def spin_roulette(spins = 100, seed = None):
-    
-    # set up all the numbers
-    Number = np.append(["00"], [str(i) for i in range(37)])
-    
-    # determine which numbers are the first 12
-    First_12 = np.concatenate((np.repeat("No", 2), np.repeat("Yes", 12), np.repeat("No", 24)))
+# build a function for the exact probability of each sorted dice combination, cached by (dice, sides)
+@lru_cache(maxsize = None)
+def combo_pmf(dice = 2, sides = 6):
     
-    # determine which numbers are the second 12
-    Second_12 = np.concatenate((np.repeat("No", 14), np.repeat("Yes", 12), np.repeat("No", 12)))
+    # count the faces of every combination, in the same order as tally_dice
+    every_combo = np.array(list(combinations_with_replacement(range(1, sides + 1), dice)))
+    faces = np.zeros((len(every_combo), sides + 1), dtype = "int64")
+    np.add.at(faces, (np.arange(len(every_combo))[:, None], every_combo), 1)
     
-    # determine which numbers are the third 12
-    Third_12 = np.concatenate((np.repeat("No", 26), np.repeat("Yes", 12)))
+    # a combination can be rolled in dice! / (count_1! ... count_sides!) orders out of sides ** dice
+    lgamma = np.vectorize(math.lgamma)
+    pmf = np.exp(math.lgamma(dice + 1) - lgamma(faces + 1).sum(axis = 1) - dice * math.log(sides))
+    pmf.flags.writeable = False
+    return pmf
+
+# build a function for the exact distribution of dice totals and sorted combinations
+def dice_distribution(dice = 2, sides = 6, combos = True):
+    distribution = {"totals": pd.DataFrame({"Total": np.arange(dice, dice * sides + 1), "Probability": total_pmf(dice, sides)}),
+                    "combos": None}
+    if combos and math.comb(sides + dice - 1, dice) <= 10**6:
+        labels = [str(list(c)) for c in combinations_with_replacement(range(1, sides + 1), dice)]
+        distribution["combos"] = pd.DataFrame({"Combo": pd.Categorical(labels, categories = labels), "Probability": combo_pmf(dice, sides)})
+    return distribution
+
+# build a function for checking the counts of tally_dice against the exact distribution with a chi-square test
+def compare_dice(tally):
     
-    # determine which numbers are the first 18
-    First_18 = np.concatenate((np.repeat("No", 2), np.repeat("Yes", 18), np.repeat("No", 18)))
+    # scipy is only loaded when a fit is tested
+    from scipy import stats
     
-    # determine which numbers are the second 18
-    Second_18 = np.concatenate((np.repeat("No", 20), np.repeat("Yes", 18)))
+    # the smallest and largest totals give the number of dice and sides
+    dice = int(tally["totals"]["Total"].min())
+    sides = int(tally["totals"]["Total"].max()) // dice
+    exact = dice_distribution(dice, sides, combos = tally["combos"] is not None)
     
-    # determine which numbers are even
-    Even = np.concatenate((np.repeat("No", 2), np.tile(["No", "Yes"], 18)))
+    # line up the counts with the expected counts of each table
+    comparison = {}
+    fit = []
+    for table, key in [("totals", "Total"), ("combos", "Combo")]:
+        if tally[table] is None:
+            continue
+        compare = pd.merge(tally[table], exact[table], on = key, how = "left")
+        compare["Expected"] = compare["Probability"] * compare["Count"].sum()
+        comparison[table] = compare
+        
+        # pool the cells expected fewer than 5 times into one, then test the fit
+        small = compare["Expected"] < 5
+        observed = np.append(compare["Count"][~small], compare["Count"][small].sum())
+        expected = np.append(compare["Expected"][~small], compare["Expected"][small].sum())
+        observed, expected = observed[expected > 0], expected[expected > 0]
+        chi2 = np.sum((observed - expected) ** 2 / expected)
+        fit.append([table, chi2, len(observed) - 1, stats.chi2.sf(chi2, len(observed) - 1)])
     
-    # determine which numbers are odd
-    Odd = np.concatenate((np.repeat("No", 2), np.tile(["Yes", "No"], 18)))
+    comparison["fit"] = pd.DataFrame(fit, columns = ["Table", "Chi2", "DF", "P_value"])
+    return comparison
+
+# set up the card codes, each card is coded as 4 * its face + its suite
+CARD_FACES = np.array([str(i + 2) for i in range(9)] + ["Jack", "King", "Queen", "Ace"])
+CARD_SUITES = np.array(["Hearts", "Diamonds", "Spades", "Clubs"])
+
+# set up the blackjack value of each card code
+CARD_VALUES = np.repeat([i + 2 for i in range(9)] + [10, 10, 10, 11], 4).astype("int8")
+
+# build a function for dealing many hands of cards at once as card codes
+def deal_cards(hands = 1, decks = 1, draws = 18, rng = None, chunk = 2**13):
     
-    # determine which numbers are green
-    Green = np.concatenate((np.repeat("Yes", 2), np.repeat("No", 36)))
+    # set up a table of card codes, one row per hand
+    stream = as_stream(rng)
+    draws = min(draws, 52 * decks)
+    dealt = np.empty((hands, draws), dtype = "uint8")
     
-    # determine which numbers are red
-    Red = np.concatenate((np.repeat("No", 2), np.tile(np.append(np.tile(["Yes", "No"], 5)[:-1], ["No", "No", "Yes", "No", "Yes", "No", "Yes", "No", "Yes"]), 2)))
-    
-    # determine which numbers are black
-    Black = ["Yes" if i == "No" else "No" for i in Red]
-    Black[:2] = ["No", "No"]
-    Black = np.array(Black)
-    
-    # determine which numbers are low 2 to 1
-    Low_2to1 = np.concatenate((np.repeat("No", 2), np.tile(["Yes", "No", "Yes"], 12)))
-    
-    # determine which numbers are middle 2 to 1
-    Middle_2to1 = np.concatenate((np.repeat("No", 2), np.tile(["No", "Yes", "No"], 12)))
-    
-    # determine which numbers are high 2 to 1
-    High_2to1 = np.concatenate((np.repeat("No", 2), np.tile(["No", "No", "Yes"], 12)))
-    
-    # create the roulette values
-    roulette = pd.DataFrame({"Number": Number,
-                             "First_12": First_12,
-                             "Second_12": Second_12,
-                             "Third_12": Third_12,
-                             "First_18": First_18,
-                             "Second_18": Second_18,
-                             "Even": Even,
-                             "Odd": Odd,
-                             "Green": Green,
-                             "Red": Red,
-                             "Black": Black,
-                             "Low_2to1": Low_2to1,
-                             "Middle_2to1": Middle_2to1,
-                             "High_2to1": High_2to1})
-    
-    # spin values from roulette 
-    values = roulette.sample(n = spins, axis = 0, replace = True, random_state = seed).reset_index(drop = True)
+    # deal the hands a chunk at a time to keep the shuffles small
+    for start in range(0, hands, chunk):
+        rows = min(chunk, hands - start)
+        
+        # shuffle each hand's decks by giving every card a random key
+        keys = stream.random((rows, 52 * decks))
+        
+        # draw the cards with the smallest keys, in order of their keys
+        drawn = np.argpartition(keys, draws - 1, axis = 1)[:, :draws] if 0 < draws < 52 * decks else np.argsort(keys, axis = 1)[:, :draws]
+        drawn = np.take_along_axis(drawn, np.argsort(np.take_along_axis(keys, drawn, axis = 1), axis = 1), axis = 1)
+        
+        # the decks hold each card code decks times in a row
+        dealt[start:start + rows] = drawn // decks
     
-    return values
-
-# check out the output of each function
-roll_dice()
-draw_cards()
-spin_roulette()
+    return dealt
 
-# ----------------------------------------------------------------------------------
-# ---- Rolling Dice ----------------------------------------------------------------
-# ----------------------------------------------------------------------------------
+# build a function for converting card codes into a table of face values and suites
+def card_frame(codes):
+    codes = np.asarray(codes)
+    return pd.DataFrame({"Face": CARD_FACES[codes // 4], "Suite": CARD_SUITES[codes % 4]})
 
-# set the work directory
-os.chdir(mywd)
-
-# roll a pair of dice
-dice = roll_dice(rolls = int(3e5), dice = 2, sides = 6, seed = 21)
-
-# compute the total of each roll
-dice["Total"] = dice.sum(axis = 1)
-
-# compute the combination of each roll
-dice["Combo"] = dice[["Dice_1", "Dice_2"]].values.tolist()
-
-# sort each roll combination
-dice["Combo"] = dice["Combo"].apply(sorted)
-
-# make Combo categorical
-dice["Combo"] = pd.Categorical(values = dice["Combo"].astype("str"))
-
-# plot the distribution of the dice roll total
-total_plot = (ggplot(dice, aes(x = "Total")) +
-  geom_histogram(fill = "cornflowerblue", color = "white", binwidth = 1) + 
-  scale_x_continuous(breaks = tuple(set(dice["Total"]))) + 
-  scale_y_continuous(labels = lambda l: [format(int(np.round(v, 0)), ",") for v in l]) +
-  ggtitle("Rolling Two Dice\n") +
-  labs(x = "Total", y = "Frequency") +
-  theme_bw(25) +
-  theme(plot_title = element_text(hjust = 0.5, vjust = 1),
-        figure_size = (14, 10),
-        aspect_ratio = 4/5,
-        panel_grid_major = element_blank(),
-        panel_grid_minor = element_blank()))
-
-total_plot
-
-# plot the distribution of the dice roll combination
-combo_plot = (ggplot(dice, aes(x = "Combo")) +
-  geom_bar(fill = "cornflowerblue", color = "white") + 
-  scale_y_continuous(labels = lambda l: [format(int(np.round(v, 0)), ",") for v in l]) +
-  ggtitle("Rolling Two Dice\n") +
-  labs(x = "Combination", y = "Frequency") +
-  theme_bw(25) +
-  theme(plot_title = element_text(hjust = 0.5, vjust = 1),
-        figure_size = (14, 10),
-        aspect_ratio = 4/5,
-        axis_text_x = element_text(angle = 45, hjust = 0.5, vjust = 1),
-        panel_grid_major = element_blank(),
-        panel_grid_minor = element_blank()))
-
-combo_plot
+# build a class for a continuous shoe that's shuffled once and dealt from a cursor until the cut card comes out
+class Shoe:
+    
+    # set up the shoe, the cut card sits at penetration of the cards unless its position is given
+    def __init__(self, decks = 7, penetration = 0.75, cut_card = None, rng = None):
+        self.decks = decks
+        self.stream = as_stream(rng)
+        self.cut_card = int(round(penetration * 52 * decks)) if cut_card is None else int(cut_card)
+        if not 0 < self.cut_card <= 52 * decks:
+            raise ValueError("the cut card must be within the " + str(52 * decks) + " cards of the shoe")
+        self.shuffles = 0
+        self.shuffle()
+    
+    # shuffle every card back into the shoe
+    def shuffle(self):
+        self.cards = (self.stream.generator.permutation(52 * self.decks) // self.decks).astype("uint8")
+        self.cursor = 0
+        self.shuffles += 1
+    
+    # count the cards left in the shoe
+    @property
+    def remaining(self):
+        return len(self.cards) - self.cursor
+    
+    # count how many of each card code are left in the shoe
+    def composition(self):
+        return np.bincount(self.cards[self.cursor:], minlength = 52)
+    
+    # deal the next cards in the shoe
+    def deal(self, draws):
+        if draws > self.remaining:
+            raise ValueError("only " + str(self.remaining) + " cards are left in the shoe")
+        cards = self.cards[self.cursor:self.cursor + draws].copy()
+        self.cursor += draws
+        return cards
+    
+    # deal the cards of the next hand, shuffling first once the cut card has come out
+    def deal_hand(self, draws):
+        if self.cursor >= self.cut_card or draws > self.remaining:
+            self.shuffle()
+        return self.deal(draws)
+    
+    # deal many hands in a row as card codes, one row per hand
+    def deal_hands(self, hands, draws):
+        if draws > len(self.cards):
+            raise ValueError("a hand of " + str(draws) + " cards doesn't fit in the shoe")
+        dealt = np.empty((hands, draws), dtype = "uint8")
+        done = 0
+        while done < hands:
+            
+            # count the hands that start before the cut card and fit in the rest of the shoe
+            fit = min(hands - done, -(-(self.cut_card - self.cursor) // draws), self.remaining // draws)
+            if fit <= 0:
+                self.shuffle()
+                continue
+            
+            # deal them in one slice of the shoe
+            dealt[done:done + fit] = self.deal(fit * draws).reshape(fit, draws)
+            done += fit
+        
+        return dealt
 
-# ----------------------------------------------------------------------------------
-# ---- Blackjack -------------------------------------------------------------------
-# ----------------------------------------------------------------------------------
+# build a function for drawing cards
+def draw_cards(decks = 1, draws = 18, rng = None):
+    return card_frame(deal_cards(hands = 1, decks = decks, draws = draws, rng = rng)[0])
+
+# set up the header of a shoe archive, padded so the card codes after it start 64 bytes in
+SHOE_MAGIC = b"BJSHOES!"
+SHOE_VERSION = 1
+SHOE_HEADER = np.dtype({"names": ["magic", "version", "decks", "draws", "hands", "seed", "penetration"],
+                        "formats": ["S8", "<u4", "<u4", "<u4", "<u8", "<i8", "<f8"],
+                        "offsets": [0, 8, 12, 16, 24, 32, 40], "itemsize": 64})
+
+# build a function for dealing hands into a shoe archive once, a chunk at a time: a header then a uint8 table of card codes
+def write_shoes(path, hands = 1000, decks = 7, draws = 36, seed = 42, penetration = None, chunk = 2**16):
+    
+    # the seed is kept in the header, so it has to be a plain integer (-1 for none)
+    if seed is not None and not 0 <= int(seed) < 2**63:
+        raise ValueError("the seed of a shoe archive must be an integer from 0 to 2**63 - 1")
+    header = np.zeros(1, dtype = SHOE_HEADER)
+    header[0] = (SHOE_MAGIC, SHOE_VERSION, decks, min(draws, 52 * decks), hands, -1 if seed is None else seed, penetration or 0)
+    
+    # deal the hands from fresh decks or a continuous shoe, chunks of deal_cards are the same cards as one call
+    os.makedirs(os.path.dirname(path) or ".", exist_ok = True)
+    stream = as_stream(seed)
+    shoe = Shoe(decks = decks, penetration = penetration, rng = stream) if penetration else None
+    def write(f):
+        f.write(header.tobytes())
+        for start in range(0, hands, chunk):
+            rows = min(chunk, hands - start)
+            if shoe is None:
+                f.write(deal_cards(hands = rows, decks = decks, draws = draws, rng = stream).tobytes())
+            else:
+                f.write(shoe.deal_hands(hands = rows, draws = draws).tobytes())
+    write_atomic(path, write)
+    
+    return open_shoes(path)
 
-# blackjack rules: https://www.wikihow.com/Play-Blackjack
+# build a function for opening a shoe archive, the card codes are memory-mapped so any hand is read straight from disk
+def open_shoes(path):
+    
+    # read and check the header
+    header = np.fromfile(path, dtype = SHOE_HEADER, count = 1)
+    if header.size == 0 or header["magic"][0] != SHOE_MAGIC:
+        raise ValueError("'" + path + "' isn't a shoe archive")
+    if header["version"][0] != SHOE_VERSION:
+        raise ValueError("'" + path + "' is a version " + str(header["version"][0]) + " shoe archive, only version " + str(SHOE_VERSION) + " can be read")
+    archive = {name: header[name][0].item() for name in SHOE_HEADER.names if name not in ["magic", "version"]}
+    archive["seed"] = None if archive["seed"] < 0 else archive["seed"]
+    archive["penetration"] = archive["penetration"] or None
+    
+    # map the card codes, one row per hand
+    archive["codes"] = np.memmap(path, dtype = "uint8", mode = "r", offset = SHOE_HEADER.itemsize, shape = (archive["hands"], archive["draws"]))
+    
+    return archive
 
-# how many players are there?
-players = 5
+# build a function for keying cached results by a shoe archive: its header settles every hand in it, None until it's written
+def shoes_key(path):
+    if path is None or not os.path.exists(path):
+        return None
+    return {k: v for k, v in open_shoes(path).items() if k != "codes"}
 
-# what are the values for players standing?
-player_stands = [i for i in range(12, 17)]
+# set up the bets on a roulette table and what each one pays to 1
+ROULETTE_BETS = ["First_12", "Second_12", "Third_12", "First_18", "Second_18", "Even", "Odd",
+                 "Green", "Red", "Black", "Low_2to1", "Middle_2to1", "High_2to1"]
+ROULETTE_ODDS = np.array([2, 2, 2, 1, 1, 1, 1, 17, 1, 1, 2, 2, 2])
 
-# what is the value for the dealer standing?
-dealer_stands = [17]
+# build a function for laying out roulette: the number of each pocket and which bets it wins
+def roulette_layout():
+    
+    # set up all the numbers, the pockets 00 and 0 count as -1 and 0
+    Number = np.append(["00"], [str(i) for i in range(37)])
+    n = np.arange(38) - 1
+    
+    # determine which numbers are red
+    red = np.isin(n, [1, 3, 5, 7, 9, 12, 14, 16, 18, 19, 21, 23, 25, 27, 30, 32, 34, 36])
+    
+    # determine which bets each pocket wins, one column per bet in ROULETTE_BETS
+    wins = np.column_stack(((n >= 1) & (n <= 12),
+                            (n >= 13) & (n <= 24),
+                            (n >= 25),
+                            (n >= 1) & (n <= 18),
+                            (n >= 19),
+                            (n >= 1) & (n % 2 == 0),
+                            (n >= 1) & (n % 2 == 1),
+                            n <= 0,
+                            red,
+                            (n >= 1) & ~red,
+                            (n >= 1) & (n % 3 == 1),
+                            (n >= 1) & (n % 3 == 2),
+                            (n >= 1) & (n % 3 == 0)))
+    
+    return Number, wins
 
-# how many hands will be played?
-hands = 1000
+# lay out roulette once
+ROULETTE_NUMBERS, ROULETTE_WINS = roulette_layout()
 
-# how many decks will be used?
-decks = 7
+# build a function for spinning roulette as pocket indices
+def spin_pockets(spins = 100, rng = None):
+    return as_stream(rng).pockets(spins)
 
-# set up a grid for standing strategies
-stand_strategies = pd.DataFrame(np.array(np.meshgrid(player_stands,
-                                                     player_stands,
-                                                     player_stands,
-                                                     player_stands,
-                                                     player_stands,
-                                                     dealer_stands)).reshape(players + 1, int(len(player_stands)**players * len(dealer_stands))).T,
-                                columns = np.concatenate((["Player_" + str(i + 1) for i in range(players)], ["Dealer"])))
+# build a function for the net payout of each spin, bets holds the stake on each of ROULETTE_BETS
+def roulette_payouts(pockets, bets):
+    
+    # bets can also be a dict of stakes by bet name, or one column of stakes per betting pattern
+    if isinstance(bets, dict):
+        bets = [bets.get(b, 0) for b in ROULETTE_BETS]
+    bets = np.asarray(bets, dtype = "float64")
+    
+    # get the net payout of each pocket: the winning stakes returned with their odds, less every stake
+    pocket_payouts = ROULETTE_WINS @ (bets * (ROULETTE_ODDS + 1).reshape((-1,) + (1,) * (bets.ndim - 1))) - bets.sum(axis = 0)
+    
+    return pocket_payouts[np.asarray(pockets)]
+
+# build a function for converting pocket indices into a table of roulette values
+def roulette_frame(pockets):
+    pockets = np.asarray(pockets)
+    values = pd.DataFrame({"Number": ROULETTE_NUMBERS[pockets]})
+    for j, b in enumerate(ROULETTE_BETS):
+        values[b] = np.where(ROULETTE_WINS[pockets, j], "Yes", "No")
+    return values
 
-# add a Strategy column to stand_strategies
-stand_strategies["Strategy"] = stand_strategies.index.values
+# build a function for spinning roulette
+def spin_roulette(spins = 100, rng = None):
+    return roulette_frame(spin_pockets(spins = spins, rng = rng))
 
-# set up all the face values
-faces = [str(i + 2) for i in range(9)]
-faces.extend(["Jack", "King", "Queen", "Ace"])
+# build a function for playing many roulette sessions in lockstep with a betting system on one bet
+def simulate_sessions(sessions = 10000, bankroll = 100, base_bet = 1, bet = "Red", system = "flat", max_spins = 1000,
+                      table_min = 1, table_max = 500, stop_loss = None, stop_win = None, rng = None):
+    
+    # set up how each system sizes its stake: base_bet times a unit for each progression step
+    # and where each system steps to after a win, every loss steps up by one
+    fibonacci = [1, 1]
+    while len(fibonacci) < 64:
+        fibonacci.append(fibonacci[-1] + fibonacci[-2])
+    systems = {"flat": (lambda k: np.ones_like(k), lambda k: 0 * k),
+               "martingale": (lambda k: 2.0 ** k, lambda k: 0 * k),
+               "dalembert": (lambda k: 1 + k, lambda k: np.maximum(k - 1, 0)),
+               "fibonacci": (lambda k: np.array(fibonacci, dtype = "float64")[np.minimum(k, 63)], lambda k: np.maximum(k - 2, 0))}
+    if system not in systems:
+        raise ValueError("system must be one of " + ", ".join(systems))
+    units, after_win = systems[system]
+    column = ROULETTE_BETS.index(bet)
+    
+    # set up the state of each session
+    stream = as_stream(rng)
+    money = np.full(sessions, bankroll, dtype = "float64")
+    step = np.zeros(sessions, dtype = "int64")
+    spins = np.zeros(sessions, dtype = "int64")
+    outcome = np.full(sessions, "max_spins", dtype = object)
+    playing = np.arange(sessions)
+    
+    # spin for every session still playing
+    for spin in range(max_spins):
+        
+        # sessions that can't cover the table minimum are ruined
+        broke = money[playing] < table_min
+        outcome[playing[broke]] = "ruin"
+        playing = playing[~broke]
+        if playing.size == 0:
+            break
+        
+        # size each stake within the table limits and the money left
+        stake = np.minimum(np.clip(base_bet * units(step[playing]), table_min, table_max), money[playing])
+        
+        # spin the wheel and settle the bet
+        won = ROULETTE_WINS[stream.pockets(playing.size), column]
+        money[playing] += np.where(won, stake * ROULETTE_ODDS[column], -stake)
+        step[playing] = np.where(won, after_win(step[playing]), step[playing] + 1)
+        spins[playing] += 1
+        
+        # stop the sessions that hit their stop-loss or stop-win
+        done = np.zeros(playing.size, dtype = "bool")
+        if stop_loss is not None:
+            hit = money[playing] <= bankroll - stop_loss
+            outcome[playing[hit]] = "stop_loss"
+            done |= hit
+        if stop_win is not None:
+            hit = ~done & (money[playing] >= bankroll + stop_win)
+            outcome[playing[hit]] = "stop_win"
+            done |= hit
+        playing = playing[~done]
+    
+    # sessions that end their last spin broke are ruined too
+    outcome[playing[money[playing] < table_min]] = "ruin"
+    
+    # summarize the sessions
+    results = pd.DataFrame({"Bankroll": money, "Spins": spins, "Outcome": outcome})
+    summary = pd.DataFrame({"Sessions": [sessions],
+                            "Ruin_prob": [np.mean(outcome == "ruin")],
+                            "Stop_loss_prob": [np.mean(outcome == "stop_loss")],
+                            "Stop_win_prob": [np.mean(outcome == "stop_win")],
+                            "Bankroll_mean": [money.mean()],
+                            "Bankroll_sd": [money.std()],
+                            "Bankroll_q05": [np.quantile(money, 0.05)],
+                            "Bankroll_q50": [np.quantile(money, 0.5)],
+                            "Bankroll_q95": [np.quantile(money, 0.95)],
+                            "Spins_mean": [spins.mean()],
+                            "Spins_median": [np.median(spins)],
+                            "Spins_max": [spins.max()]})
+    
+    return {"sessions": results, "summary": summary}
 
-# set up all the point values for each face
-points = [i + 2 for i in range(9)]
-points.extend([10, 10, 10, 11])
+# build a function for playing a blackjack hand until it reaches its stand value
+def play_hand(total, soft, shoe, cursor, stand):
+    
+    # draw another card while total is less than stand and the shoe isn't empty
+    while total < stand and cursor < len(shoe):
+        
+        # add the next card in the shoe to the hand
+        card = shoe[cursor]
+        cursor += 1
+        total += card
+        soft += card == 11
+        
+        # if total > 21 and there's an Ace counted as 11, count it as 1
+        if total > 21 and soft > 0:
+            total -= 10
+            soft -= 1
+    
+    return total, soft, cursor
 
-# create a table of face values
-face_values = pd.DataFrame({"Face": faces, "Value": points})
+# build a function for playing one table of blackjack, the dealer is the last seat
+def play_table(shoe, stands):
+    
+    # the first two rounds of cards were dealt to each seat in turn
+    seats = len(stands)
+    cursor = 2 * seats
+    
+    # play through each seat in order
+    totals = []
+    for s in range(seats):
+        
+        # get the value of the seat's first two cards, a pair of Aces is a soft 12
+        total = shoe[s] + shoe[seats + s]
+        soft = (shoe[s] == 11) + (shoe[seats + s] == 11)
+        if total > 21:
+            total -= 10
+            soft -= 1
+        
+        # draw cards up to the seat's stand value
+        total, soft, cursor = play_hand(total, soft, shoe, cursor, stands[s])
+        totals.append(total)
+    
+    return totals
 
-# draw cards for each hand
-draw_hands = []
-np.random.seed(42)
-seeds = np.random.choice(a = [i + 1 for i in range(int(hands * 100))],
-                         size = (hands),
-                         replace = False)
-for i in range(hands):
-    draw_hands.append(draw_cards(decks = decks, draws = (players + 1) * (2 + 4), seed = seeds[i]))
+# build a function for determining which players beat the dealer (the last column of totals)
+def table_wins(totals):
+    
+    # split up the totals of the players and the dealer
+    totals = np.asarray(totals)
+    player_totals = totals[..., :-1]
+    dealer_totals = totals[..., -1:]
+    
+    # a player wins by not breaking 21 while the dealer breaks 21 or has less
+    return (player_totals <= 21) & ((dealer_totals > 21) | (player_totals > dealer_totals))
 
-# create the order of Players
-player_order = np.concatenate((["Player_" + str(o + 1) for o in range(players)], ["Dealer"]))
+# build a function for playing every stand strategy on one shoe of card values
+def play_strategies(shoe, strategies):
+    
+    # plain ints are much faster than numpy scalars in the hand loops
+    shoe = np.asarray(shoe).tolist()
+    
+    # play through each strategy, one row of stand values per strategy
+    totals = [play_table(shoe, stands) for stands in np.asarray(strategies).tolist()]
+    
+    return table_wins(totals)
 
-# set up a table to hold the strategy success
-blackjack_success = pd.DataFrame(columns = np.append(["Hand", "Strategy"], [w + "_won" for w in player_order[:-1]]))
+# build a function for playing every stand strategy on one shoe, playing each distinct table state once
+def play_strategy_tree(shoe, strategies, timers = NO_TIMERS):
+    
+    # plain ints are much faster than numpy scalars in the hand loops
+    shoe = np.asarray(shoe).tolist()
+    strategies = np.asarray(strategies)
+    seats = strategies.shape[1]
+    
+    # every strategy starts with the shoe after the first two rounds of cards
+    totals = np.zeros(strategies.shape, dtype = "int16")
+    cursors = np.full(strategies.shape[0], 2 * seats)
+    
+    # walk the seats in order, the dealer is the last seat
+    for s in range(seats):
+        
+        # get the value of the seat's first two cards, a pair of Aces is a soft 12
+        total = shoe[s] + shoe[seats + s]
+        soft = (shoe[s] == 11) + (shoe[seats + s] == 11)
+        if total > 21:
+            total -= 10
+            soft -= 1
+        
+        # strategies that reach the same cursor with the same stand value share a branch
+        width = int(strategies[:, s].max()) + 1
+        states, branch = np.unique(cursors * width + strategies[:, s], return_inverse = True)
+        
+        # play each branch once and hand its result to every strategy on it
+        with timers.phase("dealer play" if s == seats - 1 else "player play"):
+            outcomes = np.array([play_hand(total, soft, shoe, state // width, state % width)[::2] for state in states.tolist()])
+            totals[:, s] = outcomes[branch, 0]
+            cursors = outcomes[branch, 1]
+    
+    with timers.phase("scoring"):
+        return table_wins(totals)
 
-# play through each hand using stand_strategies
-for i in range(214, hands):
+# build a class for collecting typed columns of results in growable chunks, instead of concatenating tables row by row
+class ResultBuffer:
+    
+    # set up the columns (a dict of name: dtype) and the number of rows in each chunk
+    def __init__(self, columns, chunk = 2**16):
+        self.columns = dict(columns)
+        self.chunk = chunk
+        self.chunks = []
+        self.filled = 0
+        self.rows = 0
+    
+    def __len__(self):
+        return self.rows
     
-    # play through each strategy on hand i
-    for k in stand_strategies.index.values:
+    # add rows to the columns, scalars are repeated across the rows
+    def append(self, **values):
         
-        # get hand i and keep track of its drawing order
-        table_hands = draw_hands[i]
-        table_hands = table_hands.reset_index()
+        # line up the values as columns of the same number of rows
+        values = [v.reshape(-1) for v in np.broadcast_arrays(*[np.asarray(values[c]).reshape(-1) if np.ndim(values[c]) > 0 else values[c] for c in self.columns])]
+        rows = values[0].size
         
-        # join face_values onto table_hands
-        table_hands = pd.merge(face_values, table_hands, left_on = "Face", right_on = "Face", how = "right")
+        # fill the last chunk and preallocate another one when it's full
+        done = 0
+        while done < rows:
+            if not self.chunks or self.filled == len(self.chunks[-1][0]):
+                self.chunks.append([np.empty(max(self.chunk, rows - done), dtype = d) for d in self.columns.values()])
+                self.filled = 0
+            take = min(rows - done, len(self.chunks[-1][0]) - self.filled)
+            for column, value in zip(self.chunks[-1], values):
+                column[self.filled:self.filled + take] = value[done:done + take]
+            self.filled += take
+            done += take
+        self.rows += rows
+    
+    # get each column as one array
+    def arrays(self):
+        out = {}
+        for j, c in enumerate(self.columns):
+            parts = [chunk[j] for chunk in self.chunks[:-1]]
+            if self.chunks:
+                parts.append(self.chunks[-1][j][:self.filled])
+            out[c] = np.concatenate(parts) if parts else np.empty(0, dtype = self.columns[c])
+        return out
+    
+    # get the columns as a table
+    def to_frame(self):
+        return pd.DataFrame(self.arrays())
+
+# build a function for the CLT interval of a win rate pooled over hands, each hand is one cluster of seats sharing the dealer's cards
+# (total and count add up each hand's won fraction and seats, total_sq, cross and count_sq their squares and product, clusters the hands)
+# limits bound the rate, e.g. (-1, 1) for the difference of two win rates
+def cluster_interval(total, count, total_sq, cross, count_sq, clusters, z = 1.96, limits = (0, 1)):
+    total, count, clusters = [np.asarray(x, dtype = "float64") for x in (total, count, clusters)]
+    with np.errstate(invalid = "ignore", divide = "ignore"):
+        rate = total / count
         
-        # sort table_hands by index
-        table_hands = table_hands.sort_values(by = "index", ascending = True).reset_index(drop = True)
+        # the variance of the ratio over hands, with a small-sample correction for the number of hands
+        spread = (np.asarray(total_sq) - 2 * rate * np.asarray(cross) + rate**2 * np.asarray(count_sq)) / count**2
+        spread = z * np.sqrt(np.maximum(spread, 0) * clusters / (clusters - 1))
+    
+    # fewer than two hands don't pin the rate down at all
+    lower = np.where(clusters > 1, np.clip(rate - spread, *limits), float(limits[0]))
+    upper = np.where(clusters > 1, np.clip(rate + spread, *limits), float(limits[1]))
+    return lower, upper
+
+# build a class for adding up blackjack wins as hands are played, instead of keeping a row per (hand, strategy)
+class BlackjackTally:
+    
+    # set up the counts for the strategies (one row of stand values per strategy, dealer last)
+    def __init__(self, strategies, players = None):
+        self.strategies = np.asarray(strategies)
+        self.seats = self.strategies.shape[1]
+        self.players = [str(p) for p in players] if players is not None else ["Player_" + str(p + 1) for p in range(self.seats - 1)]
         
-        # remove the index column
-        table_hands = table_hands.drop("index", axis = 1)
+        # index each player's stand value among every stand value the players use
+        self.stands = np.unique(self.strategies[:, :-1])
+        self.stand_index = np.searchsorted(self.stands, self.strategies[:, :-1])
         
-        # deal cards to players
-        table_hands["Player"] = np.concatenate((np.tile(np.concatenate((["Player_" + str(d + 1) for d in range(players)], ["Dealer"])), 2),
-                                                np.tile(["Unknown"], len(table_hands.index) - ((players + 1) * 2))))
+        # index the average table strategy of each strategy
+        self.tables, self.table_index = np.unique(np.round(self.strategies[:, :-1].mean(axis = 1), 1), return_inverse = True)
         
-        # split up table_hands by player_order
-        player_hands = []
-        for j in player_order:
-            player_hands.append(table_hands.loc[table_hands["Player"] == j].reset_index(drop = True))
+        # every strategy with the same stand value plays the same seat on a hand, so a hand counts once in each
+        # (player, stand value, starting hand value) cell, adding the fraction of those strategies that won
+        self.wins = np.zeros((len(self.players), len(self.stands), 23), dtype = "float64")
+        self.trials = np.zeros(self.wins.shape, dtype = "int64")
         
-        # get the undealt cards
-        undealt_cards = table_hands.loc[table_hands["Player"] == "Unknown"].reset_index(drop = True)
+        # the seats of a hand share the dealer's cards, so the pooled players and tables keep the sums over hands
+        # that give a cluster interval: won fraction, seats, their squares and product, and hands
+        sums = ["total", "count", "total_sq", "cross", "count_sq", "clusters"]
+        self.pooled = {s: np.zeros((len(self.stands), 23)) for s in sums}
+        self.pooled_stand = {s: np.zeros(len(self.stands)) for s in sums}
+        self.table = {s: np.zeros(len(self.tables)) for s in sums}
+        self.hands = 0
+    
+    # add the counts of another tally of the same strategies, e.g. one kept by a worker process
+    def merge(self, other):
+        if not np.array_equal(self.strategies, other.strategies):
+            raise ValueError("only tallies of the same strategies can be merged")
+        self.wins += other.wins
+        self.trials += other.trials
+        for s in self.pooled:
+            self.pooled[s] += other.pooled[s]
+            self.pooled_stand[s] += other.pooled_stand[s]
+            self.table[s] += other.table[s]
+        self.hands += other.hands
+    
+    # add the sums of one hand to a cluster tally
+    @staticmethod
+    def _add_cluster(sums, total, count):
+        sums["total"] += total
+        sums["count"] += count
+        sums["total_sq"] += total**2
+        sums["cross"] += total * count
+        sums["count_sq"] += count**2
+        sums["clusters"] += count > 0
+    
+    # get the fraction of each player's strategies that won on one shoe by stand value, and which stand values were played
+    def seat_wins(self, wins, rows = None):
+        rows = np.arange(self.strategies.shape[0]) if rows is None else np.asarray(rows)
+        wins = np.asarray(wins)
+        won = np.zeros((len(self.players), len(self.stands)))
+        played = np.zeros(won.shape, dtype = bool)
+        for p in range(len(self.players)):
+            strategies = np.bincount(self.stand_index[rows, p], minlength = len(self.stands))
+            won[p] = np.bincount(self.stand_index[rows, p], weights = wins[:, p], minlength = len(self.stands))
+            won[p] = np.divide(won[p], strategies, out = np.zeros(len(self.stands)), where = strategies > 0)
+            played[p] = strategies > 0
+        return won, played
+    
+    # add the wins of one shoe (its card values), rows are the strategies the wins belong to
+    def update(self, shoe, wins, rows = None):
+        rows = np.arange(self.strategies.shape[0]) if rows is None else np.asarray(rows)
+        wins = np.asarray(wins)
         
-        # set up a list to hold the final value of each players hand
-        hand_values = []
+        # compute the starting value of each player's hand at the deal, Aces count as 11
+        start = shoe[:len(self.players)] + shoe[self.seats:self.seats + len(self.players)]
         
-        # play through strategy k for each player
-        for p in range(len(player_order)):
-            
-            # get player p's hand
-            player_hand = player_hands[p]
-            
-            # get the value of player p's hand
-            hand_value = sum(player_hand["Value"])
-            
-            # get the value of player p's k-th stand_strategy
-            stand_value = stand_strategies[player_order[p]][k]
-            
-            # draw another card while hand_value is less than stand_value
-            while hand_value < stand_value:
-                
-                # add a card to player_hand
-                player_hand = pd.concat([player_hand, undealt_cards.head(1)], axis = "rows").reset_index(drop = True)
-                
-                # remove this card from undealt_cards
-                undealt_cards = undealt_cards.iloc[1:].reset_index(drop = True)
-                
-                # get the value of player p's hand
-                hand_value = sum(player_hand["Value"])
-                
-                # if hand_value > 21 and there's an Ace in player_hand, update the Ace value to 1
-                if (hand_value > 21 and "Ace" in player_hand["Face"]):
-                    
-                    # determine where the Ace is
-                    ace_position = np.where(np.array(player_hand["Face"]) == "Ace")[0].astype("int")
-                    
-                    # update the Ace value(s)
-                    for a in ace_position:
-                        player_hand.at[ace_position[a], "Value"] = 1
-                    
-                    # get the value of player p's hand
-                    hand_value = sum(player_hand["Value"])
-                    
-            # add hand_value to hand_values
-            hand_values = np.append(hand_values, hand_value)
+        # add the fraction of each player's strategies that won by stand value under the player's starting hand value
+        won, played = self.seat_wins(wins, rows)
+        total = np.zeros(self.pooled["total"].shape)
+        count = np.zeros(total.shape)
+        for p in range(len(self.players)):
+            self.wins[p, :, start[p]] += won[p]
+            self.trials[p, :, start[p]] += played[p]
+            total[:, start[p]] += won[p]
+            count[:, start[p]] += played[p]
+        self._add_cluster(self.pooled, total, count)
+        self._add_cluster(self.pooled_stand, total.sum(axis = 1), count.sum(axis = 1))
         
-        # set up a list for holding strategy success
-        strategy_success = [i, k]
+        # add the table's won fraction by table strategy
+        played = np.bincount(self.table_index[rows], minlength = len(self.tables))
+        won = np.bincount(self.table_index[rows], weights = wins.sum(axis = 1), minlength = len(self.tables))
+        self._add_cluster(self.table, np.divide(won, played, out = np.zeros(len(self.tables)), where = played > 0), (played > 0) * len(self.players))
+        self.hands += 1
+    
+    # build a table of win percentages from counts by (player, ...), with the cluster interval of the players' pooled win percentage
+    def _score(self, wins, trials, pooled, keys, z = 1.96):
+        with np.errstate(invalid = "ignore", divide = "ignore"):
+            rates = wins / trials
+        score = pd.DataFrame(keys)
+        for p in range(len(self.players)):
+            score[self.players[p] + "_won"] = rates[p]
+        score["Avg_won"] = np.nanmean(rates, axis = 0)
+        with np.errstate(invalid = "ignore", divide = "ignore"):
+            score["Pooled_won"] = pooled["total"] / pooled["count"]
+        score["Pooled_lower"], score["Pooled_upper"] = cluster_interval(**pooled, z = z)
+        return score
+    
+    # compute the win percentage for each stand value of each player
+    def strategy_score(self):
+        score = self._score(self.wins.sum(axis = 2), self.trials.sum(axis = 2), self.pooled_stand, {"Player": self.stands})
+        return score.sort_values(by = "Avg_won", ascending = False).reset_index(drop = True)
+    
+    # compute the win percentage of each average table strategy
+    def table_score(self):
+        with np.errstate(invalid = "ignore", divide = "ignore"):
+            score = pd.DataFrame({"Table": self.tables, "Table_won": self.table["total"] / self.table["count"]})
+        score["Table_lower"], score["Table_upper"] = cluster_interval(**self.table)
+        return score.sort_values(by = "Table_won", ascending = False).reset_index(drop = True)
+    
+    # compute the win percentage for each stand value of each player by starting hand value, z sets the interval width
+    def strategy_hand_score(self, z = 1.96):
         
-        # determine the table results for strategy k on hand i
-        for r in range(players):
-            
-            # if the dealer broke 21 and player r didn't, that's a win
-            if (hand_values[players] > 21 and hand_values[r] <= 21):
-                strategy_success = np.append(strategy_success, [1])
+        # only keep the (stand value, starting hand value) pairs that were dealt
+        stand, hand = np.nonzero(self.trials.sum(axis = 0))
+        pooled = {s: self.pooled[s][stand, hand] for s in self.pooled}
+        score = self._score(self.wins[:, stand, hand], self.trials[:, stand, hand], pooled, {"Player": self.stands[stand], "Player_hand": hand}, z = z)
+        return score.sort_values(by = ["Avg_won", "Player"], ascending = False).reset_index(drop = True)
+    
+    # get the best stand value for each starting hand value up to 21, ties go to the lowest stand value
+    def hand_scores(self, z = 1.96):
+        score = self.strategy_hand_score(z)
+        score = score.loc[score["Player_hand"] <= 21]
+        score = score.sort_values(by = ["Player_hand", "Avg_won", "Player"], ascending = [True, False, True])
+        score = score.drop_duplicates(subset = "Player_hand")
+        return score.sort_values(by = ["Player", "Player_hand"], ascending = True).reset_index(drop = True)
+
+# build a function for the z of a confidence radius that holds for every one of tests, at every round of a search at once
+def anytime_z(delta, tests, round_):
+    return NormalDist().inv_cdf(1 - delta / (2 * tests * round_ * (round_ + 1)))
+
+# build a function for searching the best stand value of each starting hand value adaptively, dropping the stand values
+# that are clearly worse for a starting hand value as hands are played
+def search_blackjack(strategies, players = None, decks = 7, hands = 1000, batch = 50, budget = None, precision = 0.005, delta = 0.05, rng = None):
+    
+    # the strategies hold one row of stand values per strategy, dealer last
+    strategies = np.asarray(strategies)
+    seats = strategies.shape[1]
+    
+    # the budget counts strategy-hands, by default every strategy playing hands hands
+    budget = hands * strategies.shape[0] if budget is None else budget
+    stream = as_stream(rng)
+    
+    # add up every hand in one tally, the stand values still in the running for each starting hand value up to 22 (a pair of Aces)
+    tally = BlackjackTally(strategies, players = players)
+    stands = len(tally.stands)
+    alive = np.ones((stands, 23), dtype = bool)
+    settled = np.zeros(23, dtype = bool)
+    tests = stands * (stands - 1) // 2 * 19
+    
+    # every stand value of a seat plays the same cards, so they're compared by the difference of their won fractions on
+    # each hand: paired[s, t, h] adds up stand value s less stand value t for starting hand value h, clustered by hand
+    paired = {s: np.zeros((stands, stands, 23)) for s in tally.pooled}
+    played, spent, round_ = 0, 0, 0
+    
+    # play a batch of hands at a time until every starting hand value up to 21 is settled or the budget runs out
+    exhausted = False
+    while not settled[4:22].all() and not exhausted:
+        for shoe in CARD_VALUES[deal_cards(hands = batch, decks = decks, draws = seats * 6, rng = stream)]:
             
-            # if player r beat the dealer without breaking 21, that's a win
-            elif (hand_values[r] > hand_values[players] and hand_values[r] <= 21):
-                strategy_success = np.append(strategy_success, [1])
+            # only play the strategies whose stand value is still in the running for each player's starting hand value
+            start = shoe[:seats - 1] + shoe[seats:2 * seats - 1]
+            rows = np.nonzero(alive[tally.stand_index, start].all(axis = 1))[0]
+            exhausted = spent + rows.size > budget
+            if exhausted:
+                break
+            wins = play_strategy_tree(shoe, strategies[rows])
+            tally.update(shoe, wins, rows = rows)
+            spent += rows.size
+            played += 1
             
-            # otherwise player r lost
-            else:
-                strategy_success = np.append(strategy_success, [0])
+            # add the differences between the stand values each player played
+            won, dealt = tally.seat_wins(wins, rows)
+            total = np.zeros(paired["total"].shape)
+            count = np.zeros(total.shape)
+            for p in range(seats - 1):
+                both = dealt[p][:, None] & dealt[p][None, :]
+                total[:, :, start[p]] += np.where(both, won[p][:, None] - won[p][None, :], 0)
+                count[:, :, start[p]] += both
+            BlackjackTally._add_cluster(paired, total, count)
+        round_ += 1
         
-        # convert strategy_success into a table
-        strategy_success_table = pd.DataFrame(columns = blackjack_success.columns)
-        strategy_success_table.loc[0] = strategy_success
+        # drop the stand values another one still in the running clearly beats, the intervals hold across every pair of
+        # stand values, starting hand value and round with probability 1 - delta
+        lower, upper = cluster_interval(**paired, z = anytime_z(delta, tests, round_), limits = (-1, 1))
+        alive &= ~np.any(alive[:, None, :] & (lower > 0), axis = 0)
         
-        # add strategy_success_table to blackjack_success
-        blackjack_success = pd.concat([blackjack_success, strategy_success_table], axis = "rows").reset_index(drop = True)
-        
-        # clean out the garbage in RAM
-        gc.collect()
-        
-        # report progress
-        print("---- Blackjack Strategy " + str(k + 1) + " of " + str(len(stand_strategies.index.values)) + " on Hand " + str(i + 1) + " of " + str(hands) + " completed on " + time.ctime() + " ----")
-
-# export the results
-# blackjack_success.to_csv("Blackjack Simulation - Part 3.csv", index = False)
-
-# import the results
-# blackjack_success1 = pd.read_csv("Blackjack Simulation - Part 1.csv")
-# blackjack_success2 = pd.read_csv("Blackjack Simulation - Part 2.csv")
-# blackjack_success = pd.concat([blackjack_success1, blackjack_success2], axis = "index").reset_index(drop = True)
+        # a starting hand value is settled once one stand value is left, or the ones left are within precision of each other
+        close = (lower >= -precision) & (upper <= precision)
+        settled = (alive.sum(axis = 0) == 1) | np.all(~(alive[:, None, :] & alive[None, :, :]) | close, axis = (0, 1))
+    
+    # score each stand value by starting hand value, and whether it's still in the running
+    score = tally.strategy_hand_score()
+    stand = np.searchsorted(tally.stands, score["Player"])
+    score.insert(2, "Hands", tally.pooled["clusters"][stand, score["Player_hand"]].astype("int64"))
+    score["Active"] = alive[stand, score["Player_hand"]]
+    score = score.sort_values(by = ["Player_hand", "Active", "Pooled_won", "Player"], ascending = [True, False, False, True]).reset_index(drop = True)
+    
+    # the best stand value still in the running for each starting hand value up to 21, ties go to the lowest stand value
+    hand_scores = score.loc[score["Active"] & (score["Player_hand"] <= 21)].drop_duplicates(subset = "Player_hand").drop(columns = "Active")
+    hand_scores["Settled"] = settled[hand_scores["Player_hand"]]
+    hand_scores = hand_scores.sort_values(by = ["Player", "Player_hand"]).reset_index(drop = True)
+    
+    return {"stands": score, "hand_scores": hand_scores, "hands": played, "strategy_hands": spent}
 
-# compute the starting value of each players hand
-start_values = pd.DataFrame(columns = np.append(["Hand"], [h + "_hand" for h in player_order[:-1]]))
-for i in range(hands):
+# build a function for writing a file atomically, so an interrupted run never leaves half a file
+def write_atomic(path, write):
     
-    # get hand i and keep track of its drawing order
-    hand_i = draw_hands[i]
-    hand_i = hand_i.reset_index()
+    # write to a temporary file next to path, then swap it into place
+    temp = path + ".tmp"
+    with open(temp, "wb") as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp, path)
+
+# build a function for playing the hands of one shard and writing out its results
+def play_shard(shoes, strategies, players, columns, start, stop, file, tally = None, timers = NO_TIMERS, report = None):
     
-    # join face_values onto hand_i
-    hand_i = pd.merge(face_values, hand_i, left_on = "Face", right_on = "Face", how = "right")
+    # determine the table results for every strategy on each hand of the shard
+    strategy = np.arange(strategies.shape[0])
+    results = ResultBuffer(columns, chunk = (stop - start) * strategies.shape[0])
+    for i in range(start, stop):
+        wins = play_strategy_tree(shoes[i], strategies, timers = timers)
+        if tally is not None:
+            with timers.phase("tally"):
+                tally.update(shoes[i], wins)
+        with timers.phase("result append"):
+            results.append(Hand = i, Strategy = strategy, **{p + "_won": wins[:, j] for j, p in enumerate(players)})
+        if report is not None:
+            report.update()
     
-    # sort hand_i by index
-    hand_i = hand_i.sort_values(by = "index", ascending = True).reset_index(drop = True)
+    # write out the shard
+    with timers.phase("writing"):
+        write_atomic(file, lambda f: np.savez_compressed(f, **results.arrays()))
     
-    # remove the index column
-    hand_i = hand_i.drop("index", axis = 1)
+    return len(results)
+
+# the shoes, strategies and settings a worker process plays its shards with
+_shard_worker = {}
+
+# build a function for setting up a worker process: attach to the shoes in shared memory
+def _shard_worker_init(shm_name, shape, dtype, strategies, players, columns, tally, timed):
+    shm = shared_memory.SharedMemory(name = shm_name)
+    _shard_worker.update(shm = shm, shoes = np.ndarray(shape, dtype = dtype, buffer = shm.buf), strategies = strategies,
+                         players = players, columns = columns, tally = tally, timed = timed)
+
+# build a function for playing one shard in a worker process, returning its rows, tally and phase times
+def _shard_task(task):
+    start, stop, file = task
+    w = _shard_worker
+    tally = BlackjackTally(w["strategies"], players = w["players"]) if w["tally"] else None
+    timers = Timers(enabled = w["timed"])
+    rows = play_shard(w["shoes"], w["strategies"], w["players"], w["columns"], start, stop, file, tally = tally, timers = timers)
+    return rows, tally, timers.seconds, timers.calls
+
+# build a function for playing every stand strategy on every shoe in resumable shards of hands
+def run_blackjack(shoes, strategies, path, players = None, shard_size = 50, tally = None, progress = 10.0, timers = NO_TIMERS, workers = 1):
     
-    # deal cards to players
-    hand_i["Player"] = np.concatenate((np.tile(np.concatenate((["Player_" + str(d + 1) for d in range(players)], ["Dealer"])), 2),
-                                            np.tile(["Unknown"], len(hand_i.index) - ((players + 1) * 2))))
+    # the shoes (one row of card values per hand) and strategies (one row of stand values per strategy, dealer last)
+    shoes = np.asarray(shoes)
+    strategies = np.asarray(strategies)
+    if players is None:
+        players = ["Player_" + str(p + 1) for p in range(strategies.shape[1] - 1)]
     
-    # compute the starting value of hand_i for each player
-    hand_i_values = [i]
-    for j in player_order[:-1]:
-        hand_i_values = np.append(hand_i_values, sum(hand_i.loc[hand_i["Player"] == j]["Value"]))
+    # fingerprint the inputs so a restart can't mix results of different runs
+    fingerprint = hashlib.sha256(shoes.astype("int8").tobytes() + strategies.astype("int16").tobytes()).hexdigest()
     
-    # store hand_i_values
-    start_values.loc[i] = hand_i_values
-
-# compute the average table strategy
-stand_strategies["Table"] = np.round(stand_strategies[player_order[:-1]].apply(np.mean, axis = 1), 1)
-
-# compute the table win percentage
-blackjack_success["Table_won"] = np.divide(blackjack_success[[w + "_won" for w in player_order[:-1]]].apply(np.sum, axis = 1), len(player_order[:-1]))
-
-# create an index column in blackjack_success
-blackjack_success = blackjack_success.reset_index()
-
-# join stand_strategies onto blackjack_success
-blackjack_success = pd.merge(stand_strategies, blackjack_success, left_on = "Strategy", right_on = "Strategy", how = "right")
-
-# join start_values onto blackjack_success
-blackjack_success = pd.merge(start_values, blackjack_success, left_on = "Hand", right_on = "Hand", how = "right")
-
-# sort blackjack_success by index
-blackjack_success = blackjack_success.sort_values(by = "index", ascending = True).reset_index(drop = True)
-
-# remove the index column
-blackjack_success = blackjack_success.drop("index", axis = "columns")
-
-# compute the win percentage for each strategy of each player
-strategy_score = []
-for i in range(len(player_order) - 1):
-    if i == 0:
-        strategy_score.append(blackjack_success.groupby(player_order[i]).mean()[[player_order[i] + "_won"]].rename_axis("Player").reset_index())
+    # load the manifest of a previous run, or start a new one
+    os.makedirs(path, exist_ok = True)
+    manifest_path = os.path.join(path, "manifest.json")
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        if manifest["fingerprint"] != fingerprint or manifest["shard_size"] != shard_size:
+            raise ValueError("'" + path + "' holds a run with different shoes, strategies or shard_size")
     else:
-        strategy_score.append(pd.concat([strategy_score[i - 1], blackjack_success.groupby(player_order[i]).mean()[[player_order[i] + "_won"]].reset_index(drop = True)], axis = "columns"))
-
-# update strategy_score
-strategy_score = strategy_score[len(player_order) - 2]
-
-# compute the average strategy_score
-strategy_score["Avg_won"] = strategy_score[[w + "_won" for w in player_order[:-1]]].apply(np.mean, axis = 1)
+        manifest = {"fingerprint": fingerprint,
+                    "hands": int(shoes.shape[0]),
+                    "strategies": int(strategies.shape[0]),
+                    "players": [str(p) for p in players],
+                    "shard_size": shard_size,
+                    "shards": {}}
+    
+    # set up the columns of the results
+    columns = {"Hand": "uint16" if shoes.shape[0] <= 2**16 else "uint32", "Strategy": "uint16" if strategies.shape[0] <= 2**16 else "uint32"}
+    columns.update({p + "_won": "bool" for p in manifest["players"]})
+    
+    # record a finished shard in the manifest
+    def record_shard(shard, name, start, stop, rows):
+        manifest["shards"][str(shard)] = {"file": name, "start": start, "stop": stop, "rows": rows}
+        with timers.phase("writing"):
+            write_atomic(manifest_path, lambda f: f.write(json.dumps(manifest, indent = 1).encode()))
+    
+    # report the hands played at most once every progress seconds, None plays silently
+    report = Progress(shoes.shape[0], label = "Blackjack", unit = "hands", interval = progress)
+    
+    # play through each shard of hands that isn't finished yet
+    shards = range(0, shoes.shape[0], shard_size)
+    pending = []
+    for shard, start in enumerate(shards):
+        name = "shard_" + str(shard).zfill(5) + ".npz"
+        stop = min(start + shard_size, shoes.shape[0])
+        
+        # a finished shard only has to be added to the tally
+        if str(shard) in manifest["shards"] and os.path.exists(os.path.join(path, name)):
+            if tally is not None:
+                with timers.phase("reading"):
+                    with np.load(os.path.join(path, name)) as finished:
+                        won = np.column_stack([finished[p + "_won"] for p in manifest["players"]])
+                with timers.phase("tally"):
+                    for i in range(start, stop):
+                        tally.update(shoes[i], won[(i - start) * strategies.shape[0]:(i - start + 1) * strategies.shape[0]])
+            report.update(stop - start)
+            continue
+        
+        # play the shard here, or leave it for the workers
+        if workers == 1:
+            rows = play_shard(shoes, strategies, manifest["players"], columns, start, stop, os.path.join(path, name),
+                              tally = tally, timers = timers, report = report)
+            record_shard(shard, name, start, stop, rows)
+        else:
+            pending.append((shard, name, start, stop))
+    
+    # play the shards left across a pool of workers, who read the shoes from shared memory
+    if pending:
+        shm = shared_memory.SharedMemory(create = True, size = max(shoes.nbytes, 1))
+        try:
+            np.ndarray(shoes.shape, dtype = shoes.dtype, buffer = shm.buf)[:] = shoes
+            with ProcessPoolExecutor(max_workers = workers, initializer = _shard_worker_init,
+                                     initargs = (shm.name, shoes.shape, shoes.dtype.str, strategies, manifest["players"],
+                                                 columns, tally is not None, timers.enabled)) as pool:
+                futures = [pool.submit(_shard_task, (start, stop, os.path.join(path, name))) for shard, name, start, stop in pending]
+                
+                # collect the shards in order, so the manifest and the tally don't depend on which worker finishes first
+                for (shard, name, start, stop), future in zip(pending, futures):
+                    rows, shard_tally, seconds, calls = future.result()
+                    if tally is not None:
+                        tally.merge(shard_tally)
+                    timers.merge(seconds, calls)
+                    record_shard(shard, name, start, stop, rows)
+                    report.update(stop - start)
+        finally:
+            shm.close()
+            shm.unlink()
+    
+    return manifest
 
-# sort strategy_score by Avg_won
-strategy_score = strategy_score.sort_values(by = "Avg_won", ascending = False).reset_index(drop = True)
+# build a function for merging the shards of a blackjack run into one table of strategy success
+def merge_blackjack(path):
+    
+    # load the manifest of the run
+    with open(os.path.join(path, "manifest.json")) as f:
+        manifest = json.load(f)
+    shards = sorted(manifest["shards"].values(), key = lambda m: m["start"])
+    
+    # read each shard in order of its hands
+    columns = ["Hand", "Strategy"] + [p + "_won" for p in manifest["players"]]
+    results = {c: [] for c in columns}
+    for m in shards:
+        with np.load(os.path.join(path, m["file"])) as shard:
+            for c in columns:
+                results[c].append(shard[c])
+    
+    # build the table of strategy success
+    blackjack_success = pd.DataFrame({c: np.concatenate(results[c]) for c in columns})
+    
+    return blackjack_success
 
-# compute the average table score
-table_score = blackjack_success.groupby("Table").mean()["Table_won"].reset_index()
+# build a function for plotting the counts of one table of tally_dice, plotnine is only loaded when a plot is made
+def plot_dice(counts, x = "Total", label = "Total", title = "Rolling Two Dice"):
+    import plotnine as p9
+    
+    # label the x axis with every total, or tilt the combination labels so they fit
+    scale_x = p9.scale_x_continuous(breaks = tuple(counts[x])) if x == "Total" else p9.scale_x_discrete()
+    axis_text_x = p9.element_text() if x == "Total" else p9.element_text(angle = 45, hjust = 0.5, vjust = 1)
+    
+    plot = (p9.ggplot(counts, p9.aes(x = x, y = "Count")) +
+      p9.geom_col(fill = "cornflowerblue", color = "white", width = 1 if x == "Total" else None) + 
+      scale_x + 
+      p9.scale_y_continuous(labels = lambda l: [format(int(np.round(v, 0)), ",") for v in l]) +
+      p9.ggtitle(title + "\n") +
+      p9.labs(x = label, y = "Frequency") +
+      p9.theme_bw(25) +
+      p9.theme(plot_title = p9.element_text(hjust = 0.5, vjust = 1),
+               figure_size = (14, 10),
+               aspect_ratio = 4/5,
+               axis_text_x = axis_text_x,
+               panel_grid_major = p9.element_blank(),
+               panel_grid_minor = p9.element_blank()))
+    
+    return plot
 
-# sort table_score by Table_won
-table_score = table_score.sort_values(by = "Table_won", ascending = False).reset_index(drop = True)
+# build a function for the dice study: roll dice, compare the counts with the exact distribution and plot them
+def dice_study(rolls = int(3e5), dice = 2, sides = 6, seed = 21, output = ".", plot = True):
+    
+    # roll the dice, keeping only the counts of each total and combination
+    counts = tally_dice(rolls = rolls, dice = dice, sides = sides, rng = seed)
+    
+    # compare the counts with the exact distribution of the dice
+    fit = compare_dice(counts)
+    
+    # write out the counts and the fit
+    os.makedirs(output, exist_ok = True)
+    counts["totals"].to_csv(os.path.join(output, "Dice Totals.csv"), index = False)
+    if counts["combos"] is not None:
+        counts["combos"].to_csv(os.path.join(output, "Dice Combinations.csv"), index = False)
+    fit["fit"].to_csv(os.path.join(output, "Dice Fit.csv"), index = False)
+    
+    # plot the distribution of the dice roll total and combination
+    plots = {}
+    if plot:
+        title = "Rolling " + str(dice) + " Dice"
+        plots["totals"] = plot_dice(counts["totals"], x = "Total", label = "Total", title = title)
+        plots["totals"].save(os.path.join(output, "Dice Totals.png"), verbose = False)
+        if counts["combos"] is not None:
+            plots["combos"] = plot_dice(counts["combos"], x = "Combo", label = "Combination", title = title)
+            plots["combos"].save(os.path.join(output, "Dice Combinations.png"), verbose = False)
+    
+    return {"counts": counts, "fit": fit, "plots": plots}
 
-# compute the win percentage for each strategy of each player
-strategy_hand_score = []
-for i in range(len(player_order) - 1):
-    if i == 0:
-        strategy_hand_score.append(blackjack_success.groupby([player_order[i], player_order[i] + "_hand"]).mean()[[player_order[i] + "_won"]].rename_axis(["Player", "Player_hand"]).reset_index())
+# build a function for playing every stand strategy on the same hands, cached for seeded runs
+@cached(seed = "seed", ignore = ("path", "progress", "workers"), keys = {"shoes": shoes_key})
+def simulate_blackjack(players = 5, player_stands = range(12, 17), dealer_stands = 17, hands = 1000, decks = 7,
+                       penetration = None, seed = 42, search_seed = None, path = "Blackjack Simulation", progress = 10.0,
+                       workers = 1, shoes = None, timed = True):
+    
+    # blackjack rules: https://www.wikihow.com/Play-Blackjack
+    
+    # set up a grid for standing strategies
+    player_stands = list(player_stands)
+    stand_strategies = pd.DataFrame(np.array(np.meshgrid(*([player_stands] * players + [[dealer_stands]]))).reshape(players + 1, -1).T,
+                                    columns = np.concatenate((["Player_" + str(i + 1) for i in range(players)], ["Dealer"])))
+    
+    # add a Strategy column to stand_strategies
+    stand_strategies["Strategy"] = stand_strategies.index.values
+    
+    # time each phase of the simulation, if timed
+    timers = Timers(enabled = timed)
+    
+    # draw cards for each hand, penetration is how deep into a continuous shoe cards are dealt before it's reshuffled
+    # (None deals each hand from fresh decks)
+    draws = (players + 1) * (2 + 4)
+    with timers.phase("dealing"):
+        if shoes is not None:
+            
+            # reuse the hands of a shoe archive, dealing it first if it doesn't exist yet
+            # (a continuous shoe deals its hands back to back, so they can't be cut down to fewer draws)
+            archive = open_shoes(shoes) if os.path.exists(shoes) else write_shoes(shoes, hands = hands, decks = decks, draws = draws, seed = seed, penetration = penetration)
+            fits = archive["draws"] == draws if penetration else archive["draws"] >= draws
+            if (archive["decks"], archive["seed"], archive["penetration"]) != (decks, seed, penetration) or not fits or archive["hands"] < hands:
+                raise ValueError("'" + shoes + "' holds different hands: " + str({k: v for k, v in archive.items() if k != "codes"}))
+            draw_hands = archive["codes"][:hands, :draws]
+        elif penetration is None:
+            draw_hands = deal_cards(hands = hands, decks = decks, draws = draws, rng = seed)
+        else:
+            draw_hands = Shoe(decks = decks, penetration = penetration, rng = seed).deal_hands(hands = hands, draws = draws)
+    
+    # create the order of Players
+    player_order = np.concatenate((["Player_" + str(o + 1) for o in range(players)], ["Dealer"]))
+    strategies = stand_strategies[player_order].to_numpy()
+    
+    # get the card values of each hand in drawing order
+    shoes = CARD_VALUES[draw_hands]
+    
+    # add up the wins of each strategy as the hands are played
+    tally = BlackjackTally(strategies, players = player_order[:-1])
+    
+    # play through each hand using stand_strategies, a rerun picks up from the last finished shard
+    run_blackjack(shoes, strategies, path = path, players = player_order[:-1],
+                  tally = tally, progress = progress, timers = timers, workers = workers)
+    
+    # with a search seed, also search the same number of strategy-hands adaptively on hands of their own,
+    # spending them on the stand values still in the running for each starting hand value
+    search = None
+    if search_seed is not None:
+        search = search_blackjack(strategies, players = player_order[:-1], decks = decks, hands = hands, rng = search_seed)
+    
+    return {"strategy_score": tally.strategy_score(),
+            "table_score": tally.table_score(),
+            "strategy_hand_score": tally.strategy_hand_score(),
+            "hand_scores": tally.hand_scores(),
+            "search": search,
+            "timers": timers.summary() if timed else None}
+
+# build a function for the blackjack study: play every stand strategy on the same hands and find the best for each starting hand
+def blackjack_study(players = 5, player_stands = range(12, 17), dealer_stands = 17, hands = 1000, decks = 7,
+                    penetration = None, seed = 42, search_seed = None, output = ".", progress = 10.0, exact = False, workers = 1,
+                    shoes = None, timed = True):
+    
+    # with exact, compute the win percentages heads-up against the dealer instead of playing hands
+    if exact:
+        names = ["Player_" + str(i + 1) for i in range(players)]
+        result = {"strategy_score": None, "table_score": None,
+                  "strategy_hand_score": odds.strategy_hand_score(player_stands, dealer_stands, decks, players = names),
+                  "hand_scores": odds.hand_scores(player_stands, dealer_stands, decks, players = names),
+                  "search": None, "timers": None}
     else:
-        strategy_hand_score.append(pd.concat([strategy_hand_score[i - 1], blackjack_success.groupby([player_order[i], player_order[i] + "_hand"]).mean()[[player_order[i] + "_won"]].reset_index(drop = True)], axis = "columns"))
-
-# update strategy_hand_score
-strategy_hand_score = strategy_hand_score[len(player_order) - 2]
-
-# compute the average strategy_score
-strategy_hand_score["Avg_won"] = strategy_hand_score[[w + "_won" for w in player_order[:-1]]].apply(np.mean, axis = 1)
+        result = simulate_blackjack(players = players, player_stands = player_stands, dealer_stands = dealer_stands, hands = hands,
+                                    decks = decks, penetration = penetration, seed = seed, search_seed = search_seed,
+                                    path = os.path.join(output, "Blackjack Simulation"), progress = progress, workers = workers,
+                                    shoes = shoes, timed = timed)
+    
+    # write out the best strategy for each starting hand value up to 21, and the adaptive search's if it ran
+    os.makedirs(output, exist_ok = True)
+    result["hand_scores"].to_csv(os.path.join(output, "Blackjack Strategy.csv"), index = False)
+    if result["search"] is not None:
+        result["search"]["hand_scores"].to_csv(os.path.join(output, "Blackjack Search.csv"), index = False)
+    
+    return result
 
-# sort strategy_hand_score by Avg_won
-strategy_hand_score = strategy_hand_score.sort_values(by = ["Avg_won", "Player"], ascending = False).reset_index(drop = True)
+# build a function for the roulette study: play sessions of each betting system on the same bet
+def roulette_study(sessions = 10000, bankroll = 100, base_bet = 1, bet = "Red", systems = ("flat", "martingale", "dalembert", "fibonacci"),
+                   max_spins = 1000, stop_loss = None, stop_win = None, seed = 7, output = "."):
+    
+    # play each system on the same seed
+    summary = []
+    for system in systems:
+        result = simulate_sessions(sessions = sessions, bankroll = bankroll, base_bet = base_bet, bet = bet, system = system,
+                                   max_spins = max_spins, stop_loss = stop_loss, stop_win = stop_win, rng = seed)
+        summary.append(result["summary"].assign(System = system))
+    summary = pd.concat(summary, ignore_index = True)
+    summary = summary[["System"] + [c for c in summary.columns if c != "System"]]
+    
+    # write out the summary
+    os.makedirs(output, exist_ok = True)
+    summary.to_csv(os.path.join(output, "Roulette Sessions.csv"), index = False)
+    
+    return summary
 
-# get the best strategy for each starting hand value
-hand_scores = pd.DataFrame(columns = strategy_hand_score.columns)
-for i in list(set(strategy_hand_score["Player_hand"])):
+# build the command line: python games.py {dice, blackjack, roulette} [options]
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Run the dice, blackjack and roulette studies.")
+    commands = parser.add_subparsers(dest = "study", required = True)
     
-    # get the scores for starting hand i
-    hand_score_i = strategy_hand_score.loc[strategy_hand_score["Player_hand"] == i]
+    dice_parser = commands.add_parser("dice", help = "roll dice and compare the counts with the exact distribution")
+    dice_parser.add_argument("--rolls", type = int, default = int(3e5), help = "the rolls of the dice")
+    dice_parser.add_argument("--dice", type = int, default = 2, help = "the dice in each roll")
+    dice_parser.add_argument("--sides", type = int, default = 6, help = "the sides of each die")
+    dice_parser.add_argument("--seed", type = int, default = 21, help = "the seed of the rolls")
+    dice_parser.add_argument("--no-plot", action = "store_true", help = "skip the plots (and loading plotnine)")
     
-    # keep the max value(s) of Avg_won
-    hand_score_i = hand_score_i.loc[hand_score_i["Avg_won"] == max(hand_score_i["Avg_won"])]
+    blackjack_parser = commands.add_parser("blackjack", help = "find the best stand value for each starting hand")
+    blackjack_parser.add_argument("--hands", type = int, default = 1000, help = "the hands dealt")
+    blackjack_parser.add_argument("--decks", type = int, default = 7, help = "the decks in the shoe")
+    blackjack_parser.add_argument("--players", type = int, default = 5, help = "the players at the table")
+    blackjack_parser.add_argument("--stands", type = int, nargs = "+", default = list(range(12, 17)), help = "the stand values of the players")
+    blackjack_parser.add_argument("--dealer", type = int, default = 17, help = "the stand value of the dealer")
+    blackjack_parser.add_argument("--penetration", type = float, default = None, help = "deal from a continuous shoe reshuffled at this depth")
+    blackjack_parser.add_argument("--seed", type = int, default = 42, help = "the seed of the hands")
+    blackjack_parser.add_argument("--search", action = "store_true", help = "also run the adaptive search, written to Blackjack Search.csv")
+    blackjack_parser.add_argument("--search-seed", type = int, default = 43, help = "the seed of the adaptive search")
+    blackjack_parser.add_argument("--progress", type = float, default = 10.0, help = "the seconds between progress reports")
+    blackjack_parser.add_argument("--quiet", action = "store_true", help = "skip the progress reports")
+    blackjack_parser.add_argument("--no-timers", action = "store_true", help = "skip timing the phases of the simulation")
+    blackjack_parser.add_argument("--shoes", default = None, help = "a shoe archive to reuse the hands of, dealt first if it doesn't exist")
+    blackjack_parser.add_argument("--workers", type = int, default = 1, help = "the processes to play with, 0 for every core")
+    blackjack_parser.add_argument("--exact", action = "store_true", help = "compute the exact win percentages instead of playing hands")
     
-    # sort hand_score_i by Player and take the first row
-    hand_score_i = hand_score_i.sort_values(by = "Player", ascending = True).reset_index(drop = True).head(1)
+    roulette_parser = commands.add_parser("roulette", help = "compare betting systems over many sessions")
+    roulette_parser.add_argument("--sessions", type = int, default = 10000, help = "the sessions of each system")
+    roulette_parser.add_argument("--bankroll", type = float, default = 100, help = "the money each session starts with")
+    roulette_parser.add_argument("--base-bet", type = float, default = 1, help = "the stake of one unit")
+    roulette_parser.add_argument("--bet", default = "Red", choices = ROULETTE_BETS, help = "the bet every spin")
+    roulette_parser.add_argument("--systems", nargs = "+", default = ["flat", "martingale", "dalembert", "fibonacci"], help = "the betting systems")
+    roulette_parser.add_argument("--max-spins", type = int, default = 1000, help = "the most spins of a session")
+    roulette_parser.add_argument("--stop-loss", type = float, default = None, help = "the loss that ends a session")
+    roulette_parser.add_argument("--stop-win", type = float, default = None, help = "the win that ends a session")
+    roulette_parser.add_argument("--seed", type = int, default = 7, help = "the seed of the spins")
     
-    # add hand_score_i to hand_scores
-    hand_scores = pd.concat([hand_scores, hand_score_i], axis = "index").reset_index(drop = True)
-
-# only keep hand values up to 21
-hand_scores = hand_scores.loc[hand_scores["Player_hand"] <= 21]
-
-# sort hand_scores by Player and Player_hand
-hand_scores = hand_scores.sort_values(by = ["Player", "Player_hand"], ascending = True).reset_index(drop = True)
-
-# write out hand_scores
-hand_scores.to_csv("Blackjack Strategy.csv", index = False)
-
-
-
-
-
-
-
-
-
-
+    for p in [dice_parser, blackjack_parser, roulette_parser]:
+        p.add_argument("--output", default = ".", help = "the directory the results are written to")
+    
+    args = parser.parse_args(argv)
+    
+    if args.study == "dice":
+        result = dice_study(rolls = args.rolls, dice = args.dice, sides = args.sides, seed = args.seed,
+                            output = args.output, plot = not args.no_plot)
+        print(result["fit"]["fit"])
+    elif args.study == "blackjack":
+        result = blackjack_study(players = args.players, player_stands = args.stands, dealer_stands = args.dealer,
+                                 hands = args.hands, decks = args.decks, penetration = args.penetration, seed = args.seed,
+                                 search_seed = args.search_seed if args.search else None, output = args.output,
+                                 progress = None if args.quiet else args.progress, exact = args.exact,
+                                 workers = args.workers or None, shoes = args.shoes, timed = not args.no_timers)
+        if result["timers"] is not None:
+            print(result["timers"])
+        print(result["hand_scores"])
+        if result["search"] is not None:
+            print(result["search"]["hand_scores"])
+    else:
+        print(roulette_study(sessions = args.sessions, bankroll = args.bankroll, base_bet = args.base_bet, bet = args.bet,
+                             systems = args.systems, max_spins = args.max_spins, stop_loss = args.stop_loss,
+                             stop_win = args.stop_win, seed = args.seed, output = args.output))
+    return 0
 
+if __name__ == "__main__":
+    sys.exit(main())
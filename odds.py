@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""
+Exact Odds for the Blackjack Study
+
+Computes, without simulation, the final totals of the dealer and of each
+player stand value, and the win percentages the blackjack study estimates.
+
+The hands are played by the rules of games.play_hand: draw while the total
+is below the stand value, counting an Ace as 11 unless that breaks 21. Each
+player is scored heads-up against a dealer drawing from the full shoe, so
+the cards dealt to the other seats are left out. With several decks in the
+shoe, that moves the win percentages by well under a percentage point.
+
+A total of 22 stands for any total over 21 (a bust).
+
+@author: Nick
+"""
+
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+# the card values of a shoe, the count of each is the composition of the shoe
+VALUES = tuple(range(2, 12))
+
+def shoe_counts(decks=1):
+    """
+    Gets the composition of a full shoe: the number of cards of each value 2 to 11 (Ace)
+    """
+    return tuple(4 * decks * (4 if v == 10 else 1) for v in VALUES)
+
+@lru_cache(maxsize=None)
+def hand_totals(counts, total=0, soft=0, stand=17):
+    """
+    Computes the distribution of the final total of a hand
+
+    Parameters
+    ----------
+    counts : tuple
+        The composition of the shoe the hand draws from, see shoe_counts.
+
+    total : int
+        The total of the hand so far.
+
+    soft : int
+        The number of Aces in the hand counted as 11.
+
+    stand : int
+        The stand value of the hand.
+
+    Returns
+    -------
+    totals : numpy array
+        The probability of each final total, indexed by total, 22 for a bust
+    """
+    totals = np.zeros(23)
+    if total > 21:
+        totals[22] = 1
+    elif total >= stand:
+        totals[total] = 1
+    else:
+        # draw each card value in proportion to what's left of it in the shoe
+        n = sum(counts)
+        for i, c in enumerate(counts):
+            if c == 0:
+                continue
+            total_, soft_ = total + VALUES[i], soft + (VALUES[i] == 11)
+            if total_ > 21 and soft_ > 0:
+                total_ -= 10
+                soft_ -= 1
+            totals += c / n * hand_totals(counts[:i] + (c - 1,) + counts[i + 1:], total_, soft_, stand)
+    totals.flags.writeable = False
+    return totals
+
+@lru_cache(maxsize=None)
+def starting_hands(counts):
+    """
+    Enumerates the first two cards of a hand
+
+    Parameters
+    ----------
+    counts : tuple
+        The composition of the shoe, see shoe_counts.
+
+    Returns
+    -------
+    hands : list
+        The (starting hand value, probability, total, soft, composition left)
+        of each ordered pair of cards. The starting hand value counts Aces as
+        11, as BlackjackTally does, so a pair of Aces is 22.
+    """
+    n = sum(counts)
+    hands = []
+    for i, a in enumerate(counts):
+        for j, b in enumerate(counts):
+            b -= i == j
+            if a == 0 or b <= 0:
+                continue
+            left = list(counts)
+            left[i] -= 1
+            left[j] -= 1
+
+            # a pair of Aces is played as a soft 12
+            start = VALUES[i] + VALUES[j]
+            soft = (VALUES[i] == 11) + (VALUES[j] == 11)
+            total = start - 10 if start > 21 else start
+            soft -= start > 21
+            hands.append((start, a / n * b / (n - 1), total, soft, tuple(left)))
+    return hands
+
+def dealer_totals(decks=7, stand=17):
+    """
+    Computes the distribution of the dealer's final total
+
+    Parameters
+    ----------
+    decks : int
+        The number of decks in the shoe.
+
+    stand : int
+        The stand value of the dealer.
+
+    Returns
+    -------
+    totals : pandas DataFrame
+        The Probability of each final Total, 22 for a bust
+    """
+    totals = hand_totals(shoe_counts(decks), 0, 0, stand)
+    keep = np.nonzero(totals)[0]
+    return pd.DataFrame({"Total": keep, "Probability": totals[keep]})
+
+def stand_totals(stands=range(12, 17), decks=7):
+    """
+    Computes the distribution of a player's final total for each stand value and starting hand value
+
+    Parameters
+    ----------
+    stands : list
+        The stand values of the players.
+
+    decks : int
+        The number of decks in the shoe.
+
+    Returns
+    -------
+    totals : pandas DataFrame
+        One row per (Player stand value, Player_hand starting value, final
+        Total), with the Hand_prob of being dealt the starting hand and the
+        Probability of the final total given the starting hand
+    """
+    hands = starting_hands(shoe_counts(decks))
+    rows = []
+    for stand in stands:
+        # add up the final totals of the pairs of cards with each starting hand value
+        by_start = {}
+        for start, prob, total, soft, left in hands:
+            by_start.setdefault(start, [0.0, np.zeros(23)])
+            by_start[start][0] += prob
+            by_start[start][1] += prob * hand_totals(left, total, soft, stand)
+        for start, (prob, totals) in sorted(by_start.items()):
+            for t in np.nonzero(totals)[0]:
+                rows.append([stand, start, prob, t, totals[t] / prob])
+    return pd.DataFrame(rows, columns=["Player", "Player_hand", "Hand_prob", "Total", "Probability"])
+
+def win_odds(stands=range(12, 17), dealer_stand=17, decks=7):
+    """
+    Computes the chance each stand value beats the dealer, by starting hand value
+
+    A player wins by not breaking 21 while the dealer breaks 21 or has less.
+
+    Parameters
+    ----------
+    stands : list
+        The stand values of the players.
+
+    dealer_stand : int
+        The stand value of the dealer.
+
+    decks : int
+        The number of decks in the shoe.
+
+    Returns
+    -------
+    odds : pandas DataFrame
+        One row per (Player stand value, Player_hand starting value), with
+        the Hand_prob of being dealt the starting hand and the Won probability
+    """
+    # the chance the dealer ends below each total or breaks 21
+    dealer = hand_totals(shoe_counts(decks), 0, 0, dealer_stand)
+    beats = dealer[22] + np.concatenate(([0], np.cumsum(dealer[:22])))
+
+    totals = stand_totals(stands, decks)
+    totals["Won"] = totals["Probability"] * np.where(totals["Total"] <= 21, beats[np.minimum(totals["Total"], 22)], 0)
+    return totals.groupby(["Player", "Player_hand"], as_index=False).agg(Hand_prob=("Hand_prob", "first"), Won=("Won", "sum"))
+
+def strategy_hand_score(stands=range(12, 17), dealer_stand=17, decks=7, players=None):
+    """
+    Computes the exact table of BlackjackTally.strategy_hand_score
+
+    Every player has the same odds heads-up, so each player's column, the
+    average and the pooled win percentage are the same, and the interval
+    around it has no width.
+
+    Parameters
+    ----------
+    stands : list
+        The stand values of the players.
+
+    dealer_stand : int
+        The stand value of the dealer.
+
+    decks : int
+        The number of decks in the shoe.
+
+    players : list, optional
+        The names of the players, defaults to Player_1 to Player_5.
+
+    Returns
+    -------
+    score : pandas DataFrame
+        The win percentage of each stand value by starting hand value
+    """
+    players = [str(p) for p in players] if players is not None else ["Player_" + str(p + 1) for p in range(5)]
+    odds = win_odds(stands, dealer_stand, decks)
+    score = odds[["Player", "Player_hand"]].copy()
+    for p in players:
+        score[p + "_won"] = odds["Won"]
+    for c in ["Avg_won", "Pooled_won", "Pooled_lower", "Pooled_upper"]:
+        score[c] = odds["Won"]
+    return score.sort_values(by=["Avg_won", "Player"], ascending=False).reset_index(drop=True)
+
+def hand_scores(stands=range(12, 17), dealer_stand=17, decks=7, players=None):
+    """
+    Computes the exact table of BlackjackTally.hand_scores, "Blackjack Strategy.csv"
+
+    Parameters
+    ----------
+    stands : list
+        The stand values of the players.
+
+    dealer_stand : int
+        The stand value of the dealer.
+
+    decks : int
+        The number of decks in the shoe.
+
+    players : list, optional
+        The names of the players, defaults to Player_1 to Player_5.
+
+    Returns
+    -------
+    score : pandas DataFrame
+        The best stand value for each starting hand value up to 21, ties go
+        to the lowest stand value
+    """
+    score = strategy_hand_score(stands, dealer_stand, decks, players)
+    score = score.loc[score["Player_hand"] <= 21]
+    score = score.sort_values(by=["Player_hand", "Avg_won", "Player"], ascending=[True, False, True])
+    score = score.drop_duplicates(subset="Player_hand")
+    return score.sort_values(by=["Player", "Player_hand"], ascending=True).reset_index(drop=True)
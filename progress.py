@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+Progress Reports and Timers for the Simulations
+
+@author: Nick
+"""
+
+import time
+from contextlib import nullcontext
+import pandas as pd
+
+class Progress:
+    """
+    Reports the progress of a long run at most once every interval seconds
+
+    Parameters
+    ----------
+    total : int
+        The units of work in the run.
+
+    label : str
+        What the run is called in the reports.
+
+    unit : str
+        What a unit of work is called in the reports.
+
+    interval : float, optional
+        The fewest seconds between two reports, None never reports.
+
+    report : function
+        Takes each report line, defaults to print.
+    """
+
+    def __init__(self, total, label="Progress", unit="items", interval=10.0, report=print):
+        self.total = total
+        self.label = label
+        self.unit = unit
+        self.interval = interval
+        self.report = report
+        self.done = 0
+        self.start = time.perf_counter()
+        self.last = self.start
+
+    def update(self, n=1):
+        """
+        Adds n finished units of work, reporting when the interval has passed or the run is done
+        """
+        self.done += n
+        if self.interval is None:
+            return
+        now = time.perf_counter()
+        if now - self.last >= self.interval or self.done >= self.total:
+            self.last = now
+            self.report(self.line(now))
+
+    def line(self, now=None):
+        """
+        Describes the progress: units done, percent complete, throughput and ETA
+        """
+        elapsed = (time.perf_counter() if now is None else now) - self.start
+        rate = self.done / elapsed if elapsed > 0 else float("nan")
+        left = (self.total - self.done) / rate if rate > 0 else float("nan")
+        eta = time.strftime("%H:%M:%S", time.gmtime(left)) if left == left else "--:--:--"
+        return ("---- {}: {:,} of {:,} {} ({:.1f}%), {:,.1f} {}/s, ETA {} on {} ----"
+                .format(self.label, self.done, self.total, self.unit, 100 * self.done / max(self.total, 1),
+                        rate, self.unit, eta, time.ctime()))
+
+class _Phase:
+    """
+    Times one phase of a Timers each time it's entered
+    """
+
+    def __init__(self, timers, name):
+        self.timers = timers
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.timers.add(self.name, time.perf_counter() - self.start)
+
+class Timers:
+    """
+    Adds up the time spent in each phase of a run
+
+    Parameters
+    ----------
+    enabled : bool
+        Should the phases be timed? When False, phase() hands back a shared
+        do-nothing context, so instrumented code costs next to nothing.
+    """
+
+    _null = nullcontext()
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.seconds = {}
+        self.calls = {}
+        self._phases = {}
+
+    def phase(self, name):
+        """
+        Gets a context that times the code in it under name
+        """
+        if not self.enabled:
+            return self._null
+        phase_ = self._phases.get(name)
+        if phase_ is None:
+            phase_ = self._phases[name] = _Phase(self, name)
+        return phase_
+
+    def add(self, name, seconds):
+        """
+        Adds the seconds of one call of a phase
+        """
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def merge(self, seconds, calls):
+        """
+        Adds the seconds and calls of each phase timed elsewhere, e.g. in a worker process
+        """
+        if not self.enabled:
+            return
+        for name in seconds:
+            self.seconds[name] = self.seconds.get(name, 0.0) + seconds[name]
+            self.calls[name] = self.calls.get(name, 0) + calls[name]
+
+    def summary(self):
+        """
+        Summarizes the phases
+
+        Returns
+        -------
+        summary : pandas DataFrame
+            The calls, seconds, share of the timed seconds and seconds per call of each phase
+        """
+        summary = pd.DataFrame({"Phase": list(self.seconds),
+                                "Calls": [self.calls[p] for p in self.seconds],
+                                "Seconds": list(self.seconds.values())})
+        summary["Share"] = summary["Seconds"] / summary["Seconds"].sum()
+        summary["Per_call"] = summary["Seconds"] / summary["Calls"]
+        return summary.sort_values(by="Seconds", ascending=False).reset_index(drop=True)
+
+NO_TIMERS = Timers(enabled=False)
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+Random Streams for the Simulations
+
+@author: Nick
+"""
+
+import numpy as np
+
+class Stream:
+    """
+    A random stream that pre-draws blocks of integers and serves them from a buffer
+
+    Parameters
+    ----------
+    seed : int, numpy SeedSequence, numpy Generator, optional
+        The seed of the stream, or a generator to draw from.
+
+    block : int
+        The number of integers pre-drawn at a time for each range.
+    """
+
+    def __init__(self, seed=None, block=65536):
+        if isinstance(seed, np.random.Generator):
+            self.generator = seed
+            self.seed = seed.bit_generator.seed_seq
+        else:
+            self.seed = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+            self.generator = np.random.default_rng(self.seed)
+        self.block = block
+        self._buffers = {}
+
+    def integers(self, high, size=None):
+        """
+        Draws integers from 0 up to (not including) high
+
+        Parameters
+        ----------
+        high : int
+            The number of values to draw from.
+
+        size : int, tuple, optional
+            The shape of the draw, a single integer is returned if None.
+
+        Returns
+        -------
+        out : int, numpy array
+            The integers drawn.
+        """
+        n = 1 if size is None else int(np.prod(size))
+        buffer_, cursor = self._buffers.get(high, (None, 0))
+
+        # pre-draw another block once the buffer runs out
+        if buffer_ is None or cursor + n > buffer_.size:
+            # faces are drawn as 0 to high - 1 and shifted up by 1, so uint8 only holds them below 256
+            dtype = np.uint8 if high < 256 else np.int32
+            fresh = self.generator.integers(0, high, size=max(self.block, n), dtype=dtype)
+            buffer_ = fresh if buffer_ is None else np.concatenate((buffer_[cursor:], fresh))
+            cursor = 0
+        self._buffers[high] = (buffer_, cursor + n)
+
+        out = buffer_[cursor:cursor + n]
+        if size is None:
+            return int(out[0])
+        return out.reshape(size).copy()
+
+    def dice(self, size=None, sides=6):
+        """
+        Rolls dice with faces numbered 1 to sides
+        """
+        if size is None:
+            return self.integers(sides) + 1
+        return self.integers(sides, size) + np.uint8(1)
+
+    def pockets(self, size=None, pockets=38):
+        """
+        Spins a roulette wheel, returning the index of each pocket
+        """
+        return self.integers(pockets, size)
+
+    def sample(self, n, size):
+        """
+        Draws distinct indices from 0 up to (not including) n
+
+        Sampling without replacement can't come from a pre-drawn block, so it
+        goes straight to the generator.
+        """
+        return self.generator.choice(n, size=size, replace=False)
+
+    def random(self, size=None):
+        """
+        Draws floats from 0 up to (not including) 1
+        """
+        return self.generator.random(size)
+
+    def spawn(self, n):
+        """
+        Creates n independent child streams, e.g. one for each worker
+
+        Parameters
+        ----------
+        n : int
+            The number of streams.
+
+        Returns
+        -------
+        streams : list
+            The child streams.
+        """
+        return [Stream(s, block=self.block) for s in self.seed.spawn(n)]
+
+_default = None
+
+def as_stream(rng=None):
+    """
+    Turns the rng argument of a simulator into a Stream
+
+    Parameters
+    ----------
+    rng : int, numpy SeedSequence, numpy Generator, Stream, optional
+        A seed, generator or stream. None uses a shared stream seeded from the OS.
+
+    Returns
+    -------
+    stream : Stream
+        The stream to draw from.
+    """
+    global _default
+    if isinstance(rng, Stream):
+        return rng
+    if rng is None:
+        if _default is None:
+            _default = Stream()
+        return _default
+    return Stream(rng)
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for Caching the Results of the Simulations
+
+Checks what the cache keeps, evicts and drops, and when a cached call runs
+again, run with:
+
+    python -m pytest -q
+
+@author: Nick
+"""
+
+import importlib
+import os
+import sys
+import cache
+
+def test_cache_evicts_the_least_recently_used(tmp_path):
+    store = cache.Cache(str(tmp_path), max_bytes=10**6)
+    for i, k in enumerate(["a", "b", "c"]):
+        store.put(k, bytes(300000), {"function": "f"})
+        os.utime(store._file(k, ".pkl"), (1000 + i, 1000 + i))
+
+    # using a marks it as just used, so the next store evicts b, the least recently used
+    assert store.get("a")[0]
+    store.put("d", bytes(300000), {"function": "g"})
+    assert list(store.entries()["Key"]) == ["d", "a", "c"]
+    assert not store.get("b")[0]
+
+    # a result bigger than the cache is still kept, everything else goes
+    store.put("e", bytes(2 * 10**6))
+    assert list(store.entries()["Key"]) == ["e"]
+
+def test_cache_invalidates_by_function_and_key(tmp_path):
+    store = cache.Cache(str(tmp_path))
+    for k, function in [("a", "f"), ("b", "f"), ("c", "g"), ("d", "g")]:
+        store.put(k, k, {"function": function})
+    assert store.invalidate(function="f") == 2
+    assert store.invalidate(key="c") == 1
+    assert list(store.entries()["Key"]) == ["d"]
+    assert cache.main(["--path", str(tmp_path), "clear"]) == 0
+    assert len(store.entries()) == 0
+
+def test_cache_misses_unloadable_results(tmp_path):
+    store = cache.Cache(str(tmp_path))
+    store.put("k", 1)
+    with open(store._file("k", ".pkl"), "wb") as f:
+        f.write(b"\x80\x04\x8c\x08no_such\x8c\x01X\x93.")
+    assert store.get("k") == (False, None)
+
+def write_module(path, name, source):
+    with open(os.path.join(path, name + ".py"), "w") as f:
+        f.write(source)
+
+    # bump the modification time, in case the clock hasn't ticked since the last write
+    stat = os.stat(os.path.join(path, name + ".py"))
+    os.utime(os.path.join(path, name + ".py"), ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+def test_cached_runs_again_when_its_code_changes(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "_default", cache.Cache(str(tmp_path / "cache")))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    write_module(tmp_path, "helper", "def base():\n    return 1\n")
+    write_module(tmp_path, "unrelated", "X = 1\n")
+    write_module(tmp_path, "simulator", "from cache import cached\nfrom helper import base\nCALLS = []\n\n"
+                                        "@cached(seed='seed', ignore=('workers',))\n"
+                                        "def simulate(n, seed=None, workers=1):\n    CALLS.append(n)\n    return base() * n\n")
+    try:
+        import simulator
+        assert simulator.simulate(3, seed=1) == simulator.simulate(3, seed=1, workers=4) == 3
+        assert simulator.simulate(3, seed=None) == 3
+        assert simulator.CALLS == [3, 3]
+
+        # editing a module that isn't imported keeps the results
+        write_module(tmp_path, "unrelated", "X = 2\n")
+        simulator.simulate(3, seed=1)
+        assert simulator.CALLS == [3, 3]
+
+        # editing an imported module runs the call again, even in the same process
+        write_module(tmp_path, "helper", "def base():\n    return 100\n")
+        importlib.reload(sys.modules["helper"])
+        simulator = importlib.reload(simulator)
+        assert simulator.simulate(3, seed=1) == 300
+        assert simulator.CALLS == [3]
+    finally:
+        for name in ["simulator", "helper"]:
+            sys.modules.pop(name, None)
+
+def test_cached_keys_files_written_by_the_run(tmp_path):
+    store = cache.Cache(str(tmp_path / "cache"))
+    calls = []
+
+    def header(path):
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return f.read()
+
+    @cache.cached(seed="seed", keys={"path": header}, cache=store)
+    def simulate(path, seed=None):
+        calls.append(path)
+        if not os.path.exists(path):
+            with open(path, "w") as f:
+                f.write(str(seed))
+        return seed
+
+    # the first run writes the file and is stored under it, so the same call is found again
+    path = str(tmp_path / "archive")
+    assert simulate(path, seed=5) == simulate(path, seed=5) == 5
+    assert len(calls) == 1
+
+    # a file with different contents is a different key
+    with open(path, "w") as f:
+        f.write("other")
+    simulate(path, seed=5)
+    assert len(calls) == 2
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for Simulating with Dice
+
+Checks the fast paths of dice.py against the code they replaced or the
+exact answers they estimate, run with:
+
+    python -m pytest -q
+
+@author: Nick
+"""
+
+from itertools import combinations_with_replacement
+import numpy as np
+import dice
+
+def legacy_value(a):
+    """
+    Scores a roll the way dice.value did before the scoring table: the most valuable pattern it holds
+    """
+    matches = [(v, len(p)) for p, v in zip(dice.PATTERNS, dice.PATTERN_VALUES) if dice.sublist(p, list(a))]
+    if not matches:
+        return {"points": 0, "dice": len(a)}
+    points, used = sorted(matches)[-1]
+    return {"points": points, "dice": len(a) - used}
+
+def test_score_table_matches_legacy_scoring():
+    for n in range(0, 7):
+        for a in combinations_with_replacement(range(1, 7), n):
+            assert dice.value(list(a)) == legacy_value(a), a
+            batch = dice.value_batch(np.array([list(a) + [0] * (6 - n)]))
+            assert {"points": int(batch["points"][0]), "dice": int(batch["dice"][0])} == legacy_value(a), a
+
+def test_grid_search_same_for_any_workers():
+    serial = dice.grid_search.uncached([300, 500], [2, 3], rounds=2000, workers=1, seed=9, chunk=300)
+    parallel = dice.grid_search.uncached([300, 500], [2, 3], rounds=2000, workers=2, seed=9, chunk=300)
+    assert serial.equals(parallel)
+
+def test_compare_strategies_on_common_rolls():
+    rounds = 20000
+    grid = dice.compare_strategies([300, 350], [3], rounds=rounds, rng=12, chunk=6000)
+
+    # the baseline is the first strategy, and the differences add up to the scores
+    assert grid["diff"][0] == 0 and grid["se"][0] == 0
+    assert np.isclose(grid["diff"][1], (grid["score"][1] - grid["score"][0]) / rounds)
+
+    # the difference is near its exact value, and much tighter than on independent rolls
+    exact = dice.expected_points(350, 3) - dice.expected_points(300, 3)
+    assert abs(grid["diff"][1] - exact) < 4 * grid["se"][1]
+    independent = np.hypot(dice.play_points(rounds, 300, 3, rng=1).std(), dice.play_points(rounds, 350, 3, rng=2).std()) / np.sqrt(rounds)
+    assert grid["se"][1] < independent / 2
+
+    # the chunks add up to the scores and differences of the same rolls kept all at once
+    stream = dice.as_stream(12)
+    pts = []
+    for size in [6000, 6000, 6000, 2000]:
+        common = dice.CommonDice(size, stream)
+        pts.append([dice.play_rounds(size, p, 3, common.roll) for p in [300, 350]])
+    pts = np.concatenate(pts, axis=1)
+    assert list(grid["score"]) == list(pts.sum(axis=1))
+    assert np.isclose(grid["se"][1], (pts[1] - pts[0]).std(ddof=1) / np.sqrt(rounds))
+
+def test_expected_points_matches_play_points():
+    for min_pts, min_dice in [(300, 3), (1000, 2)]:
+        pts = dice.play_points(rounds=200000, min_pts=min_pts, min_dice=min_dice, rng=7)
+        error = pts.mean() - dice.expected_points(min_pts, min_dice)
+        assert abs(error) < 4 * pts.std() / np.sqrt(pts.size), (min_pts, min_dice, error)
+
+    # no threshold strategy beats the optimal policy
+    grid = dice.expected_grid(list(range(50, 2001, 50)), list(range(1, 7)))
+    assert grid["expected"].max() <= dice.optimal_policy()["expected"] + 1e-9
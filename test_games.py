@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the Games
+
+Checks the fast paths of games.py against the code they replaced or the
+exact answers they estimate, run with:
+
+    python -m pytest -q
+
+@author: Nick
+"""
+
+import json
+import os
+import numpy as np
+import pandas as pd
+import pytest
+import games
+
+def test_tally_dice_fits_dice_distribution():
+    for n, sides in [(2, 6), (3, 8)]:
+        tally = games.tally_dice.uncached(rolls=200000, dice=n, sides=sides, rng=5)
+        exact = games.dice_distribution(n, sides)
+        assert (tally["totals"]["Total"].to_numpy() == exact["totals"]["Total"].to_numpy()).all()
+        assert (tally["combos"]["Combo"].astype(str).to_numpy() == exact["combos"]["Combo"].astype(str).to_numpy()).all()
+        fit = games.compare_dice(tally)["fit"]
+        assert (fit["P_value"] > 0.001).all(), fit
+
+def blackjack_inputs(hands=40, seed=3):
+    """
+    Deals hands for five players and a dealer, and the grid of their stand strategies
+    """
+    strategies = np.array(np.meshgrid(*([range(12, 17)] * 5 + [[17]]))).reshape(6, -1).T
+    shoes = games.CARD_VALUES[games.deal_cards(hands=hands, decks=7, draws=36, rng=seed)]
+    return shoes, strategies
+
+def test_strategy_tree_matches_play_strategies():
+    shoes, strategies = blackjack_inputs(hands=50)
+    for shoe in shoes:
+        assert (games.play_strategy_tree(shoe, strategies) == games.play_strategies(shoe, strategies)).all()
+
+def test_run_resumes_from_a_partial_manifest(tmp_path):
+    shoes, strategies = blackjack_inputs(hands=30)
+    whole = games.BlackjackTally(strategies)
+    games.run_blackjack(shoes, strategies, str(tmp_path / "whole"), shard_size=7, tally=whole, progress=None)
+
+    # stop a run after its first shards by dropping the rest from the manifest, one leaving its file behind
+    path = str(tmp_path / "resumed")
+    manifest = games.run_blackjack(shoes, strategies, path, shard_size=7, progress=None)
+    for shard in ["2", "3"]:
+        os.remove(os.path.join(path, manifest["shards"].pop(shard)["file"]))
+    del manifest["shards"]["4"]
+    with open(os.path.join(path, "manifest.json"), "w") as f:
+        json.dump(manifest, f)
+
+    resumed = games.BlackjackTally(strategies)
+    manifest = games.run_blackjack(shoes, strategies, path, shard_size=7, tally=resumed, progress=None)
+    assert sorted(manifest["shards"], key=int) == ["0", "1", "2", "3", "4"]
+    pd.testing.assert_frame_equal(games.merge_blackjack(path), games.merge_blackjack(str(tmp_path / "whole")))
+    pd.testing.assert_frame_equal(resumed.hand_scores(), whole.hand_scores())
+
+    with pytest.raises(ValueError):
+        games.run_blackjack(shoes[::-1], strategies, path, shard_size=7, progress=None)
+
+def test_shoe_reshuffles_at_the_cut_card():
+    shoe = games.Shoe(decks=1, penetration=0.5, rng=1)
+    assert shoe.cut_card == 26 and (shoe.composition() == 1).all()
+    for cursor in [10, 20, 30]:
+        shoe.deal_hand(10)
+        assert (shoe.cursor, shoe.shuffles) == (cursor, 1)
+
+    # the cut card has come out, so the next hand comes from a fresh shuffle
+    shoe.deal_hand(10)
+    assert (shoe.cursor, shoe.shuffles) == (10, 2)
+
+    # dealing many hands at once deals the same cards, three hands to a shuffle
+    one_by_one = games.Shoe(decks=1, penetration=0.5, rng=2)
+    at_once = games.Shoe(decks=1, penetration=0.5, rng=2)
+    assert (np.array([one_by_one.deal_hand(10) for h in range(7)]) == at_once.deal_hands(hands=7, draws=10)).all()
+    assert one_by_one.shuffles == at_once.shuffles == 3
+
+    with pytest.raises(ValueError):
+        games.Shoe(decks=1, cut_card=53)
+
+def test_roulette_layout_and_payouts():
+    numbers = games.ROULETTE_NUMBERS
+    wins = pd.DataFrame(games.ROULETTE_WINS, columns=games.ROULETTE_BETS, index=numbers)
+    assert list(numbers[:2]) == ["00", "0"] and list(numbers[2:]) == [str(i) for i in range(1, 37)]
+
+    # 0 and 00 only win Green, every other number wins one bet of each group
+    assert wins.loc[["00", "0"]].sum().to_dict() == {b: 2 * (b == "Green") for b in games.ROULETTE_BETS}
+    rest = wins.drop(index=["00", "0"])
+    for group in [["First_12", "Second_12", "Third_12"], ["First_18", "Second_18"], ["Even", "Odd"],
+                  ["Red", "Black"], ["Low_2to1", "Middle_2to1", "High_2to1"]]:
+        assert (rest[group].sum(axis=1) == 1).all(), group
+    assert list(rest.index[rest["Low_2to1"]]) == [str(i) for i in range(1, 37, 3)]
+    assert list(rest.index[rest["High_2to1"]]) == [str(i) for i in range(3, 37, 3)]
+
+    # every bet loses 2 of every 38 units staked on average
+    edge = games.roulette_payouts(np.arange(38), np.eye(len(games.ROULETTE_BETS))).mean(axis=0)
+    assert np.allclose(edge, -2 / 38)
+    assert (games.roulette_payouts([0, 5, 20], {"Red": 2, "Odd": 1}) ==
+            games.roulette_payouts([0, 5, 20], [2 * (b == "Red") + (b == "Odd") for b in games.ROULETTE_BETS])).all()
+
+def test_parallel_run_matches_serial(tmp_path):
+    shoes, strategies = blackjack_inputs(hands=40)
+    runs = []
+    for workers in [1, 2]:
+        tally = games.BlackjackTally(strategies)
+        path = str(tmp_path / ("workers_" + str(workers)))
+        games.run_blackjack(shoes, strategies, path, shard_size=7, tally=tally, progress=None, workers=workers)
+        runs.append((games.merge_blackjack(path), tally.hand_scores(), tally.strategy_hand_score()))
+    for serial, parallel in zip(*runs):
+        pd.testing.assert_frame_equal(serial, parallel)
+
+def test_shoe_archive_matches_deal_cards(tmp_path):
+    archive = games.write_shoes(str(tmp_path / "fresh.bjs"), hands=300, decks=2, draws=30, seed=11, chunk=64)
+    assert (np.asarray(archive["codes"]) == games.deal_cards(hands=300, decks=2, draws=30, rng=11)).all()
+
+    archive = games.write_shoes(str(tmp_path / "shoe.bjs"), hands=300, decks=2, draws=30, seed=11, penetration=0.75, chunk=64)
+    shoe = games.Shoe(decks=2, penetration=0.75, rng=11)
+    assert (np.asarray(archive["codes"]) == shoe.deal_hands(hands=300, draws=30)).all()
+
+    reopened = games.open_shoes(str(tmp_path / "shoe.bjs"))
+    assert {k: reopened[k] for k in ["decks", "draws", "hands", "seed", "penetration"]} == \
+        {"decks": 2, "draws": 30, "hands": 300, "seed": 11, "penetration": 0.75}
+
+def test_simulation_reuses_only_matching_archives(tmp_path):
+    settings = dict(players=2, player_stands=[13, 15], hands=60, decks=2, seed=11, search_seed=None, progress=None, timed=False)
+
+    # fresh hands can be cut down to fewer draws and hands, they are the same cards
+    games.write_shoes(str(tmp_path / "fresh.bjs"), hands=80, decks=2, draws=30, seed=11)
+    plain = games.simulate_blackjack.uncached(path=str(tmp_path / "plain"), **settings)
+    reused = games.simulate_blackjack.uncached(path=str(tmp_path / "reused"), shoes=str(tmp_path / "fresh.bjs"), **settings)
+    pd.testing.assert_frame_equal(plain["hand_scores"], reused["hand_scores"])
+
+    # the hands of a continuous shoe follow each other, so they have to be dealt with the same draws
+    games.write_shoes(str(tmp_path / "shoe.bjs"), hands=80, decks=2, draws=30, seed=11, penetration=0.75)
+    with pytest.raises(ValueError):
+        games.simulate_blackjack.uncached(path=str(tmp_path / "shoe"), shoes=str(tmp_path / "shoe.bjs"), penetration=0.75, **settings)
+    games.write_shoes(str(tmp_path / "shoe_18.bjs"), hands=80, decks=2, draws=18, seed=11, penetration=0.75)
+    plain = games.simulate_blackjack.uncached(path=str(tmp_path / "plain_shoe"), penetration=0.75, **settings)
+    reused = games.simulate_blackjack.uncached(path=str(tmp_path / "shoe_18"), shoes=str(tmp_path / "shoe_18.bjs"), penetration=0.75, **settings)
+    pd.testing.assert_frame_equal(plain["hand_scores"], reused["hand_scores"])
+
+def test_search_drops_clearly_worse_stand_values():
+    strategies = np.array(np.meshgrid([12, 21], [12, 21], [17])).reshape(3, -1).T
+    search = games.search_blackjack(strategies, hands=1500, rng=5)
+
+    # standing on 21 throws away hands a stand value of 12 wins, the search stops playing it and deals more hands instead
+    dropped = search["stands"].loc[~search["stands"]["Active"]]
+    assert (dropped["Player"] == 21).all() and set(range(12, 21)) <= set(dropped["Player_hand"])
+    assert search["strategy_hands"] <= 1500 * 4 and search["hands"] > 1500
+
+    # the stand values can't play a starting hand of 21 differently, so it's settled as a tie on the lowest
+    best = search["hand_scores"].set_index("Player_hand")
+    assert best.loc[21, "Settled"] and best.loc[21, "Player"] == 12
+    assert (best.loc[best["Settled"], "Player"] == 12).all()
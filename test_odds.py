@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the Exact Odds of the Blackjack Study
+
+Checks the exact odds against simulated hands, run with:
+
+    python -m pytest -q
+
+@author: Nick
+"""
+
+import numpy as np
+import games
+import odds
+
+def test_dealer_totals_match_simulated_dealer_hands():
+    shoes = games.CARD_VALUES[games.deal_cards(hands=40000, decks=7, draws=12, rng=31)].tolist()
+    totals = np.array([games.play_hand(0, 0, shoe, 0, 17)[0] for shoe in shoes])
+    exact = odds.dealer_totals(decks=7, stand=17)
+    counts = np.bincount(np.minimum(totals, 22), minlength=23)[exact["Total"]]
+    se = np.sqrt(exact["Probability"] * (1 - exact["Probability"]) / len(shoes))
+    assert (np.abs(counts / len(shoes) - exact["Probability"]) < 4 * se).all()
+    assert np.isclose(exact["Probability"].sum(), 1)
+
+def test_win_odds_match_heads_up_hands():
+    shoes = games.CARD_VALUES[games.deal_cards(hands=20000, decks=7, draws=24, rng=32)].tolist()
+    exact = odds.win_odds(stands=range(12, 17), dealer_stand=17, decks=7)
+    exact["Won"] = exact["Hand_prob"] * exact["Won"]
+    for stand, won in exact.groupby("Player")["Won"].sum().items():
+        wins = games.table_wins([games.play_table(shoe, [stand, 17]) for shoe in shoes])[:, 0]
+
+        # the exact odds leave the player's cards in the dealer's shoe, which moves them well under a point
+        assert abs(wins.mean() - won) < 4 * np.sqrt(won * (1 - won) / len(shoes)) + 0.005, stand